@@ -1,74 +1,13 @@
 import streamlit as st 
-import sqlite3
-import hashlib
-import pandas as pd
 
-# Função para criar/conectar ao banco de dados
-def criar_bd():
-    conn = sqlite3.connect('dados_energia.db')
-    c = conn.cursor()
-    
-    # Tabela de registros de energia
-    c.execute('''CREATE TABLE IF NOT EXISTS registros
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  data DATE,
-                  co2 REAL,
-                  arvores INTEGER,
-                  total_energia REAL,
-                  energia_diaria REAL)''')
-    
-    # Tabela de usuários
-    c.execute('''CREATE TABLE IF NOT EXISTS usuarios
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  username TEXT UNIQUE,
-                  password TEXT,
-                  role TEXT)''')
-    
-    conn.commit()
-    return conn
-
-# Função para criar hash da senha
-def criar_hash(senha):
-    return hashlib.sha256(senha.encode()).hexdigest()
+import perfil
+from banco import conexao_da_sessao
+from usuarios import atualizar_usuario, autenticar_usuario, criar_usuario, excluir_usuario, listar_usuarios
 
 # Função para conectar ao banco de dados
+# A conexão é compartilhada pela sessão e o esquema é criado uma vez por processo
 def conectar_bd():
-    return criar_bd()
-
-# Função para listar usuários
-def listar_usuarios(conn):
-    return pd.read_sql('SELECT id, username, role FROM usuarios', conn)
-
-# Função para criar usuário
-def criar_usuario(conn, username, password, role):
-    c = conn.cursor()
-    try:
-        c.execute('INSERT INTO usuarios (username, password, role) VALUES (?, ?, ?)',
-                  (username, criar_hash(password), role))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-
-# Função para atualizar usuário
-def atualizar_usuario(conn, id, username, role):
-    c = conn.cursor()
-    c.execute('UPDATE usuarios SET username = ?, role = ? WHERE id = ?',
-              (username, role, id))
-    conn.commit()
-
-# Função para excluir usuário
-def excluir_usuario(conn, id):
-    c = conn.cursor()
-    c.execute('DELETE FROM usuarios WHERE id = ?', (id,))
-    conn.commit()
-
-# Função para autenticar usuário
-def autenticar_usuario(conn, username, password):
-    c = conn.cursor()
-    c.execute('SELECT * FROM usuarios WHERE username = ? AND password = ?',
-              (username, criar_hash(password)))
-    return c.fetchone()
+    return conexao_da_sessao()
 
 # Interface de login
 def login_page(conn):
@@ -94,11 +33,13 @@ def admin_page(conn):
 
     # Listar usuários
     st.subheader("Lista de Usuários")
-    df_usuarios = listar_usuarios(conn)
+    busca = st.text_input("Buscar usuário pelo nome")
+    df_usuarios = listar_usuarios(conn, busca)
     if not df_usuarios.empty:
         st.dataframe(df_usuarios, use_container_width=True)
     else:
         st.warning("Nenhum usuário cadastrado.")
+    perfil.marcar("lista de usuários")
 
     # Adicionar novo usuário
     st.subheader("Adicionar Novo Usuário")
@@ -112,13 +53,16 @@ def admin_page(conn):
                 st.rerun()
             else:
                 st.error("Erro ao adicionar usuário. Nome de usuário já existe.")
+    perfil.marcar("novo usuário")
         
     # Editar/Excluir usuário
     st.subheader("Editar ou Excluir Usuário")
+    # Rótulos das opções montados uma única vez por execução
+    rotulos = dict(zip(df_usuarios['id'], df_usuarios['username']))
     usuario_selecionado = st.selectbox(
         "Selecione um usuário para editar/excluir",
         df_usuarios['id'],
-        format_func=lambda x: f"ID {x} - {df_usuarios[df_usuarios['id'] == x]['username'].values[0]}"
+        format_func=lambda x: f"ID {x} - {rotulos[x]}"
     )
     
     if usuario_selecionado:
@@ -137,6 +81,7 @@ def admin_page(conn):
                     excluir_usuario(conn, usuario_selecionado)
                     st.success("Usuário excluído com sucesso!")
                     st.rerun()
+    perfil.marcar("edição de usuário")
 
 # Verificar se o usuário está autenticado
 def main():
@@ -152,8 +97,6 @@ def main():
             admin_page(conn)
         else:
             st.error("Acesso negado. Você não tem permissão para acessar esta página.")
-    
-    conn.close()
 
 
 
@@ -1,5 +1,11 @@
 import streamlit as st
 
+import aquecimento
+import perfil
+
+# Importa os módulos pesados e carrega os dados em segundo plano, uma vez por processo
+aquecimento.iniciar()
+
 admin_page = st.Page("Admin.py", title="Admin", icon=":material/login:")
 user_page  = st.Page("User.py", title="User", icon=":material/person:")
 
@@ -39,4 +45,10 @@ else:
 
 
 
-pg.run()
+# Com ?perfil=1 (ou PERFIL=1) a execução da página é medida (ver perfil.py).
+# A medição é gravada mesmo quando a página termina com st.rerun ou st.stop.
+perfil.iniciar(pg.title)
+try:
+    pg.run()
+finally:
+    perfil.finalizar()
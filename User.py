@@ -1,51 +1,16 @@
+from datetime import date
+
 import streamlit as st
-import sqlite3
-import pandas as pd
-import hashlib
+
+import perfil
+from banco import conexao_da_sessao
+from registros import atualizar_registro, criar_registro, excluir_registro, pagina_registros
+from usuarios import autenticar_usuario
 
 # Função para conectar ao banco de dados
+# A conexão é compartilhada pela sessão e o esquema é criado uma vez por processo
 def conectar_bd():
-    return sqlite3.connect('dados_energia.db')
-
-# Função para criar hash da senha
-def criar_hash(senha):
-    return hashlib.sha256(senha.encode()).hexdigest()
-
-# Função para autenticar usuário
-def autenticar_usuario(conn, username, password):
-    c = conn.cursor()
-    c.execute('SELECT * FROM usuarios WHERE username = ? AND password = ?',
-              (username, criar_hash(password)))
-    return c.fetchone()
-
-# Funções CRUD para registros de energia
-def criar_registro(conn, data, co2, arvores, total_energia, energia_diaria):
-    c = conn.cursor()
-    c.execute('''INSERT INTO registros 
-              (data, co2, arvores, total_energia, energia_diaria)
-              VALUES (?, ?, ?, ?, ?)''',
-              (data, co2, arvores, total_energia, energia_diaria))
-    conn.commit()
-
-def ler_registros(conn):
-    return pd.read_sql('SELECT * FROM registros ORDER BY data DESC', conn)
-
-def atualizar_registro(conn, id, data, co2, arvores, total_energia, energia_diaria):
-    c = conn.cursor()
-    c.execute('''UPDATE registros SET
-              data = ?,
-              co2 = ?,
-              arvores = ?,
-              total_energia = ?,
-              energia_diaria = ?
-              WHERE id = ?''',
-              (data, co2, arvores, total_energia, energia_diaria, id))
-    conn.commit()
-
-def excluir_registro(conn, id):
-    c = conn.cursor()
-    c.execute('DELETE FROM registros WHERE id = ?', (id,))
-    conn.commit()
+    return conexao_da_sessao()
 
 # Interface de login
 def login_page(conn):
@@ -69,8 +34,9 @@ def user_page(conn):
     st.title("📊 Página de Usuário")
     st.write(f"Bem-vindo, {st.session_state['username']}! Aqui você pode gerenciar os dados de energia.")
 
-    menu = ["Adicionar Registro", "Visualizar Registros", "Editar/Excluir Registros"]
+    menu = ["Adicionar Registro", "Importar Registros", "Visualizar Registros", "Editar/Excluir Registros"]
     choice = st.sidebar.selectbox("Menu", menu)
+    perfil.marcar("menu")
 
     if choice == "Adicionar Registro":
         st.subheader("Novo Registro")
@@ -84,9 +50,37 @@ def user_page(conn):
             criar_registro(conn, data, co2, arvores, total_energia, energia_diaria)
             st.success("Registro salvo com sucesso!")
 
+    elif choice == "Importar Registros":
+        # A importação (e o pandas) só é carregada quando esta opção é aberta
+        from importacao import COLUNAS_REGISTRO, importar_registros
+
+        st.subheader("Importar Registros")
+        st.write("Envie um arquivo CSV ou XLSX com as colunas: " + ", ".join(COLUNAS_REGISTRO) + ".")
+        arquivo = st.file_uploader("Arquivo de registros", type=["csv", "xlsx"])
+
+        if arquivo is not None and st.button("Importar"):
+            try:
+                resumo = importar_registros(conn, arquivo.getvalue(), arquivo.name)
+            except ValueError as e:
+                st.error(f"Erro ao importar o arquivo: {e}")
+            else:
+                rejeitados = resumo['rejeitados']
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Registros inseridos", f"{resumo['inseridos']:,}")
+                with col2:
+                    st.metric("Linhas rejeitadas", f"{len(rejeitados):,}")
+                with col3:
+                    st.metric("Linhas por segundo", f"{resumo['linhas_por_segundo']:,.0f}")
+                if resumo['inseridos']:
+                    st.success("Importação concluída!")
+                if not rejeitados.empty:
+                    st.warning("Algumas linhas foram rejeitadas e não foram importadas.")
+                    st.dataframe(rejeitados, use_container_width=True)
+
     elif choice == "Visualizar Registros":
         st.subheader("Registros Armazenados")
-        df = ler_registros(conn)
+        df = pagina_registros(conn, 'pagina_visualizar')
         if not df.empty:
             st.dataframe(df.style.format({
                 'co2': '{:.2f} ton',
@@ -98,19 +92,21 @@ def user_page(conn):
 
     elif choice == "Editar/Excluir Registros":
         st.subheader("Editar ou Excluir Registros")
-        df = ler_registros(conn)
+        df = pagina_registros(conn, 'pagina_editar')
         
         if not df.empty:
+            # Rótulos das opções montados uma única vez por execução
+            rotulos = dict(zip(df['id'], df['data']))
             registro_selecionado = st.selectbox(
                 "Selecione um registro para editar/excluir",
                 df['id'],
-                format_func=lambda x: f"ID {x} - {df[df['id'] == x]['data'].values[0]}"
+                format_func=lambda x: f"ID {x} - {rotulos[x]}"
             )
-            
+
             registro = df[df['id'] == registro_selecionado].iloc[0]
             
             with st.form(key='edit_form'):
-                data = st.date_input("Data", value=pd.to_datetime(registro['data']))
+                data = st.date_input("Data", value=date.fromisoformat(registro['data']))
                 co2 = st.number_input("CO₂ (toneladas)", value=registro['co2'], format="%.2f")
                 arvores = st.number_input("Número de Árvores", value=registro['arvores'])
                 total_energia = st.number_input("Total de Energia Produzida (kWh)", 
@@ -132,6 +128,7 @@ def user_page(conn):
                         st.rerun()
         else:
             st.warning("Nenhum registro encontrado para edição.")
+    perfil.marcar(choice)
 
 # Função principal para gerenciar o fluxo da aplicação
 def main():
@@ -145,8 +142,6 @@ def main():
         login_page(conn)
     else:
         user_page(conn)
-    
-    conn.close()
 
 
 # Executar a aplicação
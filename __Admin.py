@@ -3,30 +3,15 @@ import sqlite3
 import pandas as pd
 import hashlib
 
+from banco import conexao_da_sessao
+from registros import pagina_registros
+
 st.set_page_config(page_title="Admin", page_icon=":earth_americas:", layout="wide")
 
-# Função para criar/conectar ao banco de dados
-def criar_bd():
-    conn = sqlite3.connect('dados_energia.db')
-    c = conn.cursor()
-    
-    # Tabela de registros de energia
-    c.execute('''CREATE TABLE IF NOT EXISTS registros
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  data DATE,
-                  co2 REAL,
-                  arvores INTEGER,
-                  total_energia REAL,
-                  energia_diaria REAL)''')
-    
-    # Tabela de usuários
-    c.execute('''CREATE TABLE IF NOT EXISTS usuarios
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  username TEXT UNIQUE,
-                  password TEXT)''')
-    
-    conn.commit()
-    return conn
+# Função para conectar ao banco de dados
+# A conexão é compartilhada pela sessão e o esquema é criado uma vez por processo
+def conectar_bd():
+    return conexao_da_sessao()
 
 # Função para criar hash da senha
 def criar_hash(senha):
@@ -61,9 +46,6 @@ def criar_registro(conn, data, co2, arvores, total_energia, energia_diaria):
               (data, co2, arvores, total_energia, energia_diaria))
     conn.commit()
 
-def ler_registros(conn):
-    return pd.read_sql('SELECT * FROM registros ORDER BY data DESC', conn)
-
 def atualizar_registro(conn, id, data, co2, arvores, total_energia, energia_diaria):
     c = conn.cursor()
     c.execute('''UPDATE registros SET
@@ -133,7 +115,7 @@ def tela_principal(conn):
 
     elif choice == "Visualizar Registros":
         st.subheader("Registros Armazenados")
-        df = ler_registros(conn)
+        df = pagina_registros(conn, 'pagina_visualizar')
         if not df.empty:
             st.dataframe(df.style.format({
                 'co2': '{:.2f} ton',
@@ -145,13 +127,15 @@ def tela_principal(conn):
 
     elif choice == "Editar/Excluir Registros":
         st.subheader("Editar ou Excluir Registros")
-        df = ler_registros(conn)
+        df = pagina_registros(conn, 'pagina_editar')
         
         if not df.empty:
+            # Rótulos das opções montados uma única vez por execução
+            rotulos = dict(zip(df['id'], df['data']))
             registro_selecionado = st.selectbox(
                 "Selecione um registro para editar/excluir",
                 df['id'],
-                format_func=lambda x: f"ID {x} - {df[df['id'] == x]['data'].values[0]}"
+                format_func=lambda x: f"ID {x} - {rotulos[x]}"
             )
             
             registro = df[df['id'] == registro_selecionado].iloc[0]
@@ -182,7 +166,7 @@ def tela_principal(conn):
 
 # Função principal
 def main():
-    conn = criar_bd()
+    conn = conectar_bd()
     
     if 'autenticado' not in st.session_state:
         st.session_state['autenticado'] = False
@@ -202,8 +186,6 @@ def main():
             st.session_state['username'] = None
             st.rerun()
         tela_principal(conn)
-    
-    conn.close()
 
 
 main()
@@ -1,24 +1,10 @@
-import schedule
-import subprocess
-import time
+from executor import Executor, etapas_padrao
 from log import logger
 
 # Função para executar os scripts
 def executar():
-    print("Executando growatt_automacao.py...")
-    logger.info("Executando growatt_automacao.py...")
-    subprocess.run(["python", "growatt_automacao.py", "--sem-gui"], check=True)
-    logger.info("Execução finalizada.")
-
-    # print("Executando processa.py...")
-    # logger.info("Executando processa.py...")
-    # subprocess.run(["python", "processa.py"], check=True)
-    # logger.info("Execução finalizada.")
-
-    print("Executando gitrun.py...")
-    logger.info("Executando gitrun.py...")
-    subprocess.run(["python", "gitrun.py", "-m", "Data update using git"], check=True)
-    logger.info("Execução finalizada.")
+    print("Executando coleta, ingestão e publicação...")
+    Executor(etapas_padrao()).executar()
 
 
 if __name__ == "__main__":
@@ -1,27 +1,19 @@
 import schedule
-import subprocess
 import time
+from executor import Executor, etapas_padrao
 from log import logger
 
+# Executor criado uma única vez: o coletor, a ingestão e a publicação são
+# carregados no início e cada ciclo roda como chamadas de função no processo
+executor = Executor(etapas_padrao())
+
 # Função para executar os scripts
 def executar():
     print("Executando agenda.py...")
-    print("  Executando growatt_automacao.py...")
-    
-    try:
-        logger.info("Executando growatt_automacao.py...")
-        subprocess.run(["python", "growatt_automacao.py", "--sem-gui"], check=True)
-        # subprocess.run(["python", "hello.py"], check=True)
-        logger.info("Execução finalizada com sucesso.")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Erro ao executar growatt_automacao.py: {e}")
-
-
-    print("  Executando gitrun.py...")
-    logger.info("Executando gitrun.py...")
-    subprocess.run(["python", "gitrun.py", "-m", "Data update using git"], check=True)
-    logger.info("Execução finalizada.")
-
+    if executor.executar():
+        print("  Etapas: " + ", ".join(f"{nome} {duracao:.1f}s" for nome, duracao in executor.duracoes.items()))
+    else:
+        print("  Ciclo interrompido. Veja o arquivo de log.")
     print("Finalizando execução da agenda.py")
 
 
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from armazenamento import ler_diario, ler_resumo, cobre_amostras
+from colunar import ler_serie
+
+# Quantidade máxima de pontos enviados ao navegador por gráfico
+PONTOS_MAXIMOS = 500
+
+# Períodos usados para somar as barras diárias acima do limite, do menor para
+# o maior: (frequência do pandas, nome do período)
+PERIODOS_BARRAS = [("W", "semana"), ("M", "mês"), ("Y", "ano")]
+
+
+# Função para converter o eixo X (datas) em números para os cálculos
+def _eixo_numerico(valores):
+    return pd.to_datetime(pd.Series(valores)).to_numpy().astype("int64").astype("float64")
+
+
+# Função para escolher os índices a manter com o algoritmo LTTB
+# (Largest-Triangle-Three-Buckets). O primeiro e o último ponto são sempre
+# mantidos; de cada balde intermediário fica o ponto que forma o maior
+# triângulo com o ponto escolhido antes e com a média do balde seguinte.
+def lttb(x, y, limite):
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(np.asarray(y, dtype="float64"))
+    bordas = np.linspace(1, n - 1, limite - 1).astype(int)
+    indices = np.empty(limite, dtype=int)
+    indices[0] = 0
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        # O balde seguinte do último balde é o último ponto
+        proximo_fim = bordas[i + 2] if i + 2 < len(bordas) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    indices[-1] = n - 1
+    return indices
+
+
+# Função para reduzir um DataFrame ao limite de pontos.
+# Com várias colunas Y, mantém a união dos pontos escolhidos para cada uma.
+def reduzir(data, coluna_x, colunas_y, limite=PONTOS_MAXIMOS):
+    if len(data) <= limite:
+        return data
+    x = _eixo_numerico(data[coluna_x])
+    por_coluna = max(3, limite // len(colunas_y))
+    indices = np.unique(np.concatenate(
+        [lttb(x, data[coluna].to_numpy(), por_coluna) for coluna in colunas_y]))
+    return data.iloc[indices]
+
+
+# Função para limitar a quantidade de barras de uma série diária.
+# O LTTB serve para linhas: numa série de barras, os dias descartados sumiriam
+# do gráfico. Acima do limite, os dias são somados por semana, mês ou ano (o
+# primeiro período que couber) e cada barra fica no início do seu período.
+# Retorna a série e o nome do período de cada barra ("dia" se não agrupou).
+def agrupar_barras(diario, coluna_x, coluna_y, limite=PONTOS_MAXIMOS):
+    if len(diario) <= limite:
+        return diario, "dia"
+    datas = pd.to_datetime(diario[coluna_x])
+    for frequencia, periodo in PERIODOS_BARRAS:
+        somas = diario[coluna_y].groupby(datas.dt.to_period(frequencia)).sum()
+        if len(somas) <= limite:
+            break
+    return pd.DataFrame({coluna_x: somas.index.start_time, coluna_y: somas.round(1).to_numpy()}), periodo
+
+
+# Função para montar o título do eixo X de um gráfico de barras agrupado
+# por agrupar_barras
+def titulo_periodo(periodo):
+    if periodo == "dia":
+        return "Data"
+    return f"{periodo.capitalize()} (soma da geração diária)"
+
+
+# Função para obter a série de um período com o nível de detalhe adequado.
+# Se as amostras brutas do período ainda estão no banco e cabem no limite,
+# elas são usadas; senão, o resumo por hora e, por fim, a série diária,
+# reduzida ao limite se for preciso. As séries são lidas do banco (ver
+# armazenamento.py), e as amostras do armazenamento colunar quando ele está
+# em dia (ver colunar.py).
+def serie_no_periodo(conn, colunas_y, inicio=None, fim=None, limite=PONTOS_MAXIMOS):
+    if cobre_amostras(conn, inicio):
+        brutos = ler_serie(conn, ["date"] + list(colunas_y), inicio, fim)
+        if len(brutos) <= limite:
+            return brutos
+
+    horas = ler_resumo(conn, "hora", inicio, fim)
+    if len(horas) <= limite:
+        return horas[["date"] + list(colunas_y)]
+    return reduzir(ler_diario(conn, inicio, fim), "date", colunas_y, limite)
@@ -0,0 +1,264 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import ler_diario, ler_resumo, versao
+from banco import nova_conexao
+from colunar import ler_serie
+from dados import COLUNAS, FORMATO_DATA
+from log import logger
+
+# Serviço HTTP com as séries de geração para os painéis e telas da usina.
+# GET /serie?nivel=bruto|horario|diario|semanal|mensal|anual&inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+#            &formato=json|csv&colunas=today,total
+# GET /versao
+# As respostas têm ETag ligada à versão dos dados no banco (PRAGMA
+# user_version, ver armazenamento.py): quem consulta de novo com
+# If-None-Match recebe 304 até chegarem dados novos.
+# O nível "bruto" só tem as amostras dentro da retenção do banco; os demais
+# vêm dos resumos e cobrem todo o histórico.
+PORTA = int(os.environ.get("API_PORTA", "5000"))
+
+NIVEIS = ["bruto", "horario", "diario", "semanal", "mensal", "anual"]
+FORMATOS = {"json": "application/json", "csv": "text/csv; charset=utf-8"}
+
+# Respostas menores que isso não são comprimidas
+TAMANHO_MINIMO_GZIP = 1024
+# Respostas prontas guardadas por versão dos dados
+MAXIMO_RESPOSTAS = 128
+
+
+# Função para agregar a série diária por semana: a geração do
+# período ("today") é a soma dos dias e os acumulados são o último valor.
+# A data de cada linha é o início do período.
+def agregar(diario, periodo):
+    grupos = diario.groupby(diario["date"].dt.to_period(periodo))
+    agregado = grupos.agg(today=("today", "sum"), total=("total", "last"),
+                          co2=("co2", "last"), trees=("trees", "last"))
+    agregado.insert(0, "date", agregado.index.start_time)
+    return agregado.reset_index(drop=True)
+
+
+# Índice em memória compartilhado pelas requisições: as séries de cada nível
+# ordenadas por data, montadas uma vez por versão do banco. Cada requisição
+# usa um retrato (versao, series, datas) obtido de uma vez, para que uma
+# remontagem em outra thread não misture versões na mesma resposta.
+class Indice:
+
+    def __init__(self):
+        self.versao = None
+        self.retrato = (None, {}, {})
+        self._respostas = OrderedDict()
+        self._lock = threading.Lock()
+        # Conexão do índice, aberta na primeira consulta e usada só com o lock
+        self._conn = None
+
+    # Função para montar as séries de uma versão do banco
+    def _montar(self, versao):
+        conn = self._conn
+        bruto = ler_serie(conn)
+        diario = ler_diario(conn)[COLUNAS].reset_index(drop=True)
+        series = {
+            "bruto": bruto,
+            "horario": ler_resumo(conn, "hora"),
+            "diario": diario,
+            "semanal": agregar(diario, "W"),
+            "mensal": ler_resumo(conn, "mes"),
+            "anual": ler_resumo(conn, "ano"),
+        }
+        datas = {nivel: serie["date"].to_numpy() for nivel, serie in series.items()}
+        self.retrato = (versao, series, datas)
+        self._respostas.clear()
+        self.versao = versao
+        logger.info("Índice da API montado: %s amostras, %s dias.", len(bruto), len(diario))
+
+    # Função para garantir que o índice está na versão atual do banco.
+    # Retorna o retrato (versao, series, datas) usado pela requisição.
+    def atualizar(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = nova_conexao()
+            atual = versao(self._conn)
+            if atual != self.versao:
+                self._montar(atual)
+            return self.retrato
+
+    # Funções para guardar e reaproveitar respostas prontas. A chave inclui a
+    # versão; respostas montadas com uma versão já substituída são descartadas.
+    def resposta(self, versao, chave):
+        with self._lock:
+            chave = (versao, chave)
+            if chave in self._respostas:
+                self._respostas.move_to_end(chave)
+                return self._respostas[chave]
+        return None
+
+    def guardar(self, versao, chave, conteudo):
+        with self._lock:
+            if versao != self.versao:
+                return
+            self._respostas[(versao, chave)] = conteudo
+            while len(self._respostas) > MAXIMO_RESPOSTAS:
+                self._respostas.popitem(last=False)
+
+
+# Função para montar a etiqueta de uma versão do banco usada nas ETags
+def etiqueta_versao(versao):
+    return hashlib.sha1(repr(versao).encode()).hexdigest()[:16]
+
+
+# Função para obter o trecho de uma série do retrato entre duas datas (inclusive)
+def consultar(retrato, nivel, inicio=None, fim=None, colunas=None):
+    _, series, datas = retrato
+    serie, datas = series[nivel], datas[nivel]
+    i0 = np.searchsorted(datas, np.datetime64(inicio, "ns"), "left") if inicio is not None else 0
+    i1 = np.searchsorted(datas, np.datetime64(fim, "ns"), "right") if fim is not None else len(datas)
+    trecho = serie.iloc[i0:i1]
+    return trecho if colunas is None else trecho[["date"] + colunas]
+
+
+indice = Indice()
+
+
+# Função para interpretar uma data da consulta. Uma data sem hora no fim do
+# intervalo inclui o dia inteiro.
+def ler_data(texto, fim=False):
+    if not texto:
+        return None
+    try:
+        data = pd.Timestamp(texto)
+    except ValueError:
+        raise ValueError(f"Data inválida: {texto}")
+    if fim and len(texto) <= 10:
+        data += pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+    return data
+
+
+# Função para converter um trecho da série no formato pedido
+def serializar(trecho, formato):
+    if formato == "csv":
+        return trecho.to_csv(sep=";", index=False, date_format=FORMATO_DATA).encode()
+    return trecho.to_json(orient="records", date_format="iso").encode()
+
+
+class ManipuladorAPI(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/versao":
+            etiqueta = etiqueta_versao(indice.atualizar()[0])
+            self._responder(200, json.dumps({"versao": etiqueta}).encode(), FORMATOS["json"], etiqueta)
+        elif url.path == "/serie":
+            self._serie(url.query)
+        else:
+            self._erro(404, f"Caminho desconhecido: {url.path}")
+
+    # Função para responder uma consulta de série
+    def _serie(self, consulta):
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(consulta).items()}
+        nivel = parametros.get("nivel", "diario")
+        formato = parametros.get("formato", "json")
+        colunas = parametros.get("colunas")
+        colunas = colunas.split(",") if colunas else None
+        try:
+            if nivel not in NIVEIS:
+                raise ValueError(f"Nível inválido: {nivel} (use {', '.join(NIVEIS)})")
+            if formato not in FORMATOS:
+                raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+            if colunas is not None and not set(colunas) <= set(COLUNAS[1:]):
+                raise ValueError(f"Colunas inválidas: {','.join(colunas)}")
+            inicio = ler_data(parametros.get("inicio"))
+            fim = ler_data(parametros.get("fim"), fim=True)
+        except ValueError as e:
+            self._erro(400, str(e))
+            return
+
+        retrato = indice.atualizar()
+        versao_retrato = retrato[0]
+        etiqueta = etiqueta_versao(versao_retrato)
+        gz = "gzip" in self.headers.get("Accept-Encoding", "")
+        chave = (nivel, formato, tuple(colunas or ()), inicio, fim, gz)
+        etag = '"%s-%s"' % (etiqueta, hashlib.sha1(repr(chave).encode()).hexdigest()[:16])
+        if self._nao_modificado(etag):
+            return
+
+        conteudo = indice.resposta(versao_retrato, chave)
+        if conteudo is None:
+            conteudo = serializar(consultar(retrato, nivel, inicio, fim, colunas), formato)
+            if gz and len(conteudo) >= TAMANHO_MINIMO_GZIP:
+                conteudo = (gzip.compress(conteudo, compresslevel=6), "gzip")
+            else:
+                conteudo = (conteudo, None)
+            indice.guardar(versao_retrato, chave, conteudo)
+        corpo, codificacao = conteudo
+        self._responder(200, corpo, FORMATOS[formato], etag, codificacao)
+
+    # Função para responder 304 se o cliente já tem a versão atual
+    def _nao_modificado(self, etag):
+        pedidas = self.headers.get("If-None-Match")
+        if pedidas is None:
+            return False
+        pedidas = [p.strip() for p in pedidas.split(",")]
+        if etag not in pedidas and "*" not in pedidas:
+            return False
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        return True
+
+    def _responder(self, status, corpo, tipo, etag=None, codificacao=None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        if etag is not None:
+            self.send_header("ETag", etag if etag.startswith('"') else f'"{etag}"')
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+        if codificacao is not None:
+            self.send_header("Content-Encoding", codificacao)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _erro(self, status, mensagem):
+        self._responder(status, json.dumps({"erro": mensagem}, ensure_ascii=False).encode(), FORMATOS["json"])
+
+    def log_message(self, formato, *args):
+        logger.info("API %s - %s", self.address_string(), formato % args)
+
+
+# Função para iniciar o serviço
+def servir(porta=PORTA, host="0.0.0.0"):
+    # O índice é montado antes de aceitar conexões
+    indice.atualizar()
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorAPI)
+    servidor.daemon_threads = True
+    logger.info("API de séries ouvindo em %s:%s", host, porta)
+    print(f"=> API de séries em http://{host}:{porta}/serie")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Serviço HTTP com as séries de geração (JSON ou CSV).")
+    parser.add_argument("-p", "--porta", type=int, default=PORTA, help="Porta do serviço")
+    args = parser.parse_args()
+
+    servir(args.porta)
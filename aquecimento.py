@@ -0,0 +1,61 @@
+import importlib
+import threading
+import time
+from contextlib import closing
+
+from log import logger
+
+# Módulos pesados usados pelas páginas e carregados sob demanda por elas
+MODULOS = ["pandas", "plotly.express", "plotly.graph_objects"]
+
+_lock = threading.Lock()
+_iniciado = False
+# Sinaliza o fim dos imports de MODULOS (com ou sem erro)
+_modulos_prontos = threading.Event()
+
+
+# Função executada em segundo plano: importa os módulos pesados, prepara o
+# banco e carrega a série diária e o painel no cache do processo
+def _aquecer():
+    inicio = time.perf_counter()
+    try:
+        try:
+            for modulo in MODULOS:
+                importlib.import_module(modulo)
+        finally:
+            _modulos_prontos.set()
+
+        from armazenamento import ler_diario
+        from banco import nova_conexao
+        from painel import carregar_painel, figura_do_painel
+        with closing(nova_conexao()) as conn:
+            ler_diario(conn)
+        figura_do_painel(carregar_painel())
+    except Exception as e:
+        logger.error("Erro ao preparar os caches: %s", e)
+    else:
+        logger.info("Caches preparados em %.2f s.", time.perf_counter() - inicio)
+
+
+# Função para iniciar o aquecimento uma única vez por processo.
+# O Streamlit não tem um gancho de inicialização do servidor, então o
+# aquecimento começa na primeira execução do App.py e roda em paralelo com ela.
+def iniciar():
+    global _iniciado
+    with _lock:
+        if _iniciado:
+            return False
+        _iniciado = True
+    threading.Thread(target=_aquecer, name="aquecimento", daemon=True).start()
+    return True
+
+
+# Função para esperar os imports do aquecimento, se ele foi iniciado.
+# O plotly usa o pandas se ele estiver em sys.modules, então uma figura
+# montada enquanto o pandas ainda é importado em segundo plano encontraria
+# o módulo pela metade.
+def aguardar_modulos():
+    with _lock:
+        iniciado = _iniciado
+    if iniciado:
+        _modulos_prontos.wait()
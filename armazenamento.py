@@ -0,0 +1,389 @@
+import argparse
+import os
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from banco import CAMINHO_BD, nova_conexao
+from compactacao import anexar_compactado, ultima_data
+from dados import CAMINHO_DADOS, COLUNAS, FORMATO_DATA
+from janela_csv import ler_janela
+
+# Armazenamento único das leituras da usina, no mesmo banco SQLite das telas
+# de cadastro. Só a coleta e a ingestão gravam aqui: os coletores gravam as
+# amostras na tabela amostras (chave: data e hora) e, na mesma transação, a
+# consolidação do dia na tabela registros (origem "coletor"), que é a tabela
+# lida e editada em User.py. Os painéis e a API só leem as amostras, os
+# resumos e a série diária daqui.
+#
+# O data.csv é o histórico publicado no repositório: a ingestão acrescenta a
+# ele as amostras novas do banco. O coletor com navegador, que só escreve no
+# data.csv, tem as suas linhas importadas para o banco pela ingestão.
+#
+# Cada gravação atualiza também os resumos por hora, dia, mês e ano
+# (tabelas resumo_*), e as amostras mais antigas que a retenção são
+# apagadas depois de resumidas. Em cada resumo, "today" é a geração do
+# período (o maior valor do dia por hora e dia; a soma dos dias por mês e
+# ano) e os acumulados (total, co2, trees) são os da última amostra.
+
+# Formato das datas no banco (ordenável como texto)
+FORMATO_BD = "%Y-%m-%d %H:%M:%S"
+ORIGEM_COLETOR = "coletor"
+
+# Quantidade de amostras gravadas por transação
+TAMANHO_LOTE = 50_000
+
+# Dias de amostras mantidos no banco, contados da última amostra (0 mantém todas).
+# O histórico completo continua no data.csv e nos resumos.
+RETENCAO_DIAS = int(os.environ.get("RETENCAO_DIAS", "90"))
+
+# Níveis de resumo: nível -> (tabela, formato do período)
+RESUMOS = {
+    "hora": ("resumo_hora", "%Y-%m-%d %H:00:00"),
+    "dia": ("resumo_dia", "%Y-%m-%d"),
+    "mes": ("resumo_mes", "%Y-%m"),
+    "ano": ("resumo_ano", "%Y"),
+}
+# Resumos calculados direto das amostras: (tabela, tamanho do prefixo da data, sufixo)
+RESUMOS_AMOSTRAS = [("resumo_hora", 13, ":00:00"), ("resumo_dia", 10, "")]
+
+# Série diária por banco e versão: caminho -> (versao, DataFrame)
+_cache_diario = {}
+# Bancos com os resumos já conferidos neste processo
+_preparados = set()
+_lock = threading.Lock()
+
+
+# Função para obter a versão dos dados do banco. Ela é incrementada a cada
+# gravação de amostras (PRAGMA user_version, lido do cabeçalho do arquivo).
+def versao(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+# Função para converter leituras (dicionários como os de coletor_http) em linhas do banco
+def _linhas_leituras(leituras):
+    linhas = []
+    for leitura in leituras:
+        momento = leitura["date"]
+        if isinstance(momento, str):
+            momento = datetime.strptime(momento, FORMATO_DATA)
+        linhas.append((momento.strftime(FORMATO_BD), leitura["today"], leitura["total"],
+                       leitura["co2"], None if pd.isna(leitura["trees"]) else int(leitura["trees"])))
+    return linhas
+
+
+# Função para converter um DataFrame no formato do data.csv em linhas do banco
+def _linhas_tabela(data):
+    tabela = data[COLUNAS].assign(date=data["date"].dt.strftime(FORMATO_BD))
+    tabela = tabela.astype(object).where(tabela.notna(), None)
+    return list(tabela.itertuples(index=False, name=None))
+
+
+# Função para formatar uma linha do banco como linha do data.csv
+def _linha_csv(linha):
+    data, *valores = linha
+    data = datetime.strptime(data, FORMATO_BD).strftime(FORMATO_DATA)
+    return ";".join([data] + ["" if valor is None else str(valor) for valor in valores]) + "\n"
+
+
+# Função para montar a chave de comparação de uma amostra: o dia e os valores
+# (como chave_linha em compactacao.py)
+def _chave(linha):
+    return (linha[0][:10],) + tuple(linha[1:])
+
+
+# Função para compactar leituras repetidas como no data.csv (ver
+# compactacao.py): de cada sequência de amostras seguidas com a mesma chave
+# ficam só a primeira e a última. Só as amostras posteriores à última gravada
+# são compactadas. Retorna as linhas a gravar e as datas das amostras já
+# gravadas que deixaram de ser a última da sequência.
+def _compactar(conn, linhas):
+    gravadas = conn.execute("SELECT data, today, total, co2, trees FROM amostras ORDER BY data DESC LIMIT 2").fetchall()
+    cauda = [(tuple(linha), True) for linha in reversed(gravadas)]
+    novas, apagar = [], []
+    for linha in sorted(linhas):
+        if cauda and linha[0] <= cauda[-1][0][0]:
+            # Amostra anterior à última gravada: substitui ou completa o histórico
+            novas.append(linha)
+            continue
+        if len(cauda) >= 2 and _chave(cauda[-2][0]) == _chave(cauda[-1][0]) == _chave(linha):
+            substituida, gravada = cauda.pop()
+            if gravada:
+                apagar.append(substituida[0])
+        cauda.append((linha, False))
+    novas.extend(linha for linha, gravada in cauda if not gravada)
+    return novas, apagar
+
+
+# Função para resumir linhas de amostras por período (hora ou dia):
+# o maior "today" e os acumulados da última amostra de cada período
+def _resumir(linhas, tamanho, sufixo=""):
+    resumo = {}
+    for data, today, total, co2, trees in sorted(linhas):
+        periodo = data[:tamanho] + sufixo
+        anterior = resumo.get(periodo)
+        if anterior is not None and anterior[2] is not None and (today is None or anterior[2] > today):
+            today = anterior[2]
+        resumo[periodo] = (periodo, data, today, total, co2, trees)
+    return list(resumo.values())
+
+
+# Função para somar as novas amostras aos resumos por hora e por dia. Os
+# resumos são atualizados no lugar, sem reler as amostras já gravadas (que
+# podem ter sido apagadas pela retenção).
+def _atualizar_resumos(conn, linhas):
+    for tabela, tamanho, sufixo in RESUMOS_AMOSTRAS:
+        conn.executemany(f'''INSERT INTO {tabela} (periodo, ultima, today, total, co2, trees)
+                             VALUES (?, ?, ?, ?, ?, ?)
+                             ON CONFLICT (periodo) DO UPDATE SET
+                                 today = max(coalesce(today, excluded.today), coalesce(excluded.today, today)),
+                                 total = iif(excluded.ultima >= ultima, excluded.total, total),
+                                 co2 = iif(excluded.ultima >= ultima, excluded.co2, co2),
+                                 trees = iif(excluded.ultima >= ultima, excluded.trees, trees),
+                                 ultima = max(ultima, excluded.ultima)''',
+                         _resumir(linhas, tamanho, sufixo))
+
+    # Meses e anos são recalculados a partir dos resumos menores (no máximo
+    # 31 dias ou 12 meses cada). Com max(), o SQLite devolve as demais
+    # colunas da linha de maior data.
+    meses = sorted({linha[0][:7] for linha in linhas})
+    for mes in meses:
+        conn.execute('''INSERT OR REPLACE INTO resumo_mes (periodo, ultima, today, total, co2, trees)
+                        SELECT ?, max(ultima), sum(today), total, co2, trees
+                        FROM resumo_dia WHERE periodo BETWEEN ? AND ?''',
+                     (mes, f"{mes}-01", f"{mes}-31"))
+    for ano in sorted({mes[:4] for mes in meses}):
+        conn.execute('''INSERT OR REPLACE INTO resumo_ano (periodo, ultima, today, total, co2, trees)
+                        SELECT ?, max(ultima), sum(today), total, co2, trees
+                        FROM resumo_mes WHERE periodo BETWEEN ? AND ?''',
+                     (ano, f"{ano}-01", f"{ano}-12"))
+
+
+# Função para atualizar o registro consolidado (resumo do dia) de cada dia.
+# O registro do coletor é atualizado no lugar, mantendo o id usado pelas telas.
+def _consolidar_dias(conn, dias):
+    for dia in dias:
+        ultima = conn.execute("SELECT today, total, co2, trees FROM resumo_dia WHERE periodo = ?",
+                              (dia,)).fetchone()
+        if ultima is None:
+            continue
+        today, total, co2, trees = ultima
+        cursor = conn.execute('''UPDATE registros SET co2 = ?, arvores = ?, total_energia = ?, energia_diaria = ?
+                                 WHERE data = ? AND origem = ?''',
+                              (co2, trees, total, today, dia, ORIGEM_COLETOR))
+        if cursor.rowcount == 0:
+            conn.execute('''INSERT INTO registros (data, co2, arvores, total_energia, energia_diaria, origem)
+                            VALUES (?, ?, ?, ?, ?, ?)''',
+                         (dia, co2, trees, total, today, ORIGEM_COLETOR))
+
+
+# Função para gravar amostras no banco em lotes, cada lote em uma transação.
+# Amostras com a mesma data e hora são substituídas e leituras repetidas são
+# compactadas. Os resumos recebem todas as amostras do lote, inclusive as
+# descartadas pela compactação. Retorna a quantidade de amostras gravadas.
+def gravar_amostras(conn, linhas):
+    _preparar(conn)
+    gravadas = 0
+    for i in range(0, len(linhas), TAMANHO_LOTE):
+        lote = linhas[i:i + TAMANHO_LOTE]
+        with conn:
+            novas, apagar = _compactar(conn, lote)
+            conn.executemany("DELETE FROM amostras WHERE data = ?", [(data,) for data in apagar])
+            conn.executemany('INSERT OR REPLACE INTO amostras (data, today, total, co2, trees) VALUES (?, ?, ?, ?, ?)',
+                             novas)
+            _atualizar_resumos(conn, lote)
+            _consolidar_dias(conn, sorted({linha[0][:10] for linha in lote}))
+            conn.execute(f"PRAGMA user_version = {versao(conn) + 1}")
+        gravadas += len(novas)
+    return gravadas
+
+
+# Função usada pelos coletores para gravar as leituras de uma coleta
+def gravar_leituras(leituras, caminho_bd=CAMINHO_BD):
+    with closing(nova_conexao(caminho_bd)) as conn:
+        return gravar_amostras(conn, _linhas_leituras(leituras))
+
+
+# Função usada pela ingestão para trazer para o banco as linhas do data.csv
+# posteriores à última amostra gravada (coletor com navegador e carga inicial
+# do histórico). Só o trecho a partir dela é lido (ver janela_csv.py).
+def importar_csv(conn, origem=CAMINHO_DADOS):
+    if not os.path.exists(origem):
+        return 0
+    ultima = conn.execute("SELECT max(data) FROM amostras").fetchone()[0]
+    inicio = None if ultima is None else datetime.strptime(ultima, FORMATO_BD)
+    novas = ler_janela(inicio, colunas=COLUNAS, caminho=origem)
+    if ultima is not None:
+        # A última amostra gravada é relida; só as posteriores são novas
+        novas = novas[novas["date"] > inicio]
+    return gravar_amostras(conn, _linhas_tabela(novas))
+
+
+# Função usada pela ingestão para acrescentar ao data.csv publicado as
+# amostras do banco posteriores à última linha do arquivo.
+# Retorna a quantidade de linhas escritas.
+def exportar_csv(conn, destino=CAMINHO_DADOS):
+    ultima = ultima_data(destino)
+    inicio = "" if ultima is None else datetime.strptime(ultima, FORMATO_DATA).strftime(FORMATO_BD)
+    cursor = conn.execute("SELECT data, today, total, co2, trees FROM amostras WHERE data > ? ORDER BY data",
+                          (inicio,))
+    escritas = 0
+    while True:
+        lote = cursor.fetchmany(TAMANHO_LOTE)
+        if not lote:
+            return escritas
+        anexar_compactado([_linha_csv(linha) for linha in lote], destino)
+        escritas += len(lote)
+
+
+# Função para apagar as amostras mais antigas que a retenção. Elas já estão
+# nos resumos, que são atualizados na mesma transação da gravação.
+# Retorna a quantidade de amostras apagadas.
+def podar(conn, dias=RETENCAO_DIAS):
+    _preparar(conn)
+    ultima = conn.execute("SELECT max(data) FROM amostras").fetchone()[0]
+    if ultima is None or dias <= 0:
+        return 0
+    limite = (datetime.strptime(ultima, FORMATO_BD) - timedelta(days=dias)).strftime(FORMATO_BD)
+    with conn:
+        apagadas = conn.execute("DELETE FROM amostras WHERE data < ?", (limite,)).rowcount
+        if apagadas:
+            conn.execute(f"PRAGMA user_version = {versao(conn) + 1}")
+    return apagadas
+
+
+# Função para refazer todos os resumos a partir das amostras do banco
+# (bancos gravados antes da criação dos resumos), com um comando por nível
+def reconstruir_resumos(conn):
+    with conn:
+        for tabela, _ in RESUMOS.values():
+            conn.execute(f"DELETE FROM {tabela}")
+        # Hora e dia: o maior "today" e os acumulados da última amostra,
+        # buscada pela chave da tabela
+        for tabela, tamanho, sufixo in RESUMOS_AMOSTRAS:
+            conn.execute(f'''INSERT INTO {tabela} (periodo, ultima, today, total, co2, trees)
+                             SELECT p.periodo, p.ultima, p.today, a.total, a.co2, a.trees
+                             FROM (SELECT substr(data, 1, {tamanho}) || '{sufixo}' AS periodo,
+                                          max(data) AS ultima, max(today) AS today
+                                   FROM amostras GROUP BY periodo) AS p
+                             JOIN amostras AS a ON a.data = p.ultima''')
+        # Mês e ano: a soma da geração e os acumulados do último dia (ou mês)
+        for tabela, origem, tamanho in [("resumo_mes", "resumo_dia", 7), ("resumo_ano", "resumo_mes", 4)]:
+            conn.execute(f'''INSERT INTO {tabela} (periodo, ultima, today, total, co2, trees)
+                             SELECT substr(periodo, 1, {tamanho}), max(ultima), sum(today), total, co2, trees
+                             FROM {origem} GROUP BY substr(periodo, 1, {tamanho})''')
+        conn.execute(f"PRAGMA user_version = {versao(conn) + 1}")
+
+
+# Função usada antes de cada gravação para garantir, uma vez por processo,
+# que os resumos cobrem as amostras já gravadas (bancos anteriores aos
+# resumos), já que eles passam a ser atualizados só com as amostras novas.
+# O banco só é marcado como conferido depois que a reconstrução termina.
+def _preparar(conn):
+    arquivo = conn.execute("PRAGMA database_list").fetchone()[2]
+    with _lock:
+        if arquivo in _preparados:
+            return
+    sem_resumos = conn.execute("SELECT 1 FROM resumo_dia LIMIT 1").fetchone() is None
+    if sem_resumos and conn.execute("SELECT 1 FROM amostras LIMIT 1").fetchone() is not None:
+        reconstruir_resumos(conn)
+    with _lock:
+        _preparados.add(arquivo)
+
+
+# Função para ler as amostras de um período (inicio/fim inclusive), usando a
+# chave da tabela. Retorna as colunas no formato do data.csv.
+def ler_amostras(conn, colunas=None, inicio=None, fim=None):
+    colunas = list(colunas or COLUNAS)
+    selecionadas = [c for c in COLUNAS[1:] if c in colunas]
+    condicoes, parametros = [], []
+    if inicio is not None:
+        condicoes.append("data >= ?")
+        parametros.append(pd.Timestamp(inicio).strftime(FORMATO_BD))
+    if fim is not None:
+        condicoes.append("data <= ?")
+        parametros.append(pd.Timestamp(fim).strftime(FORMATO_BD))
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+    data = pd.read_sql(f"SELECT {', '.join(['data AS date'] + selecionadas)} FROM amostras {where} ORDER BY data",
+                       conn, params=parametros)
+    data["date"] = pd.to_datetime(data["date"], format=FORMATO_BD)
+    if "date_only" in colunas:
+        # Extrai apenas a data (sem a hora)
+        data["date_only"] = data["date"].dt.date
+    return data
+
+
+# Função para ler um nível de resumo (hora, dia, mês ou ano) entre duas
+# datas (inclusive). A data de cada linha é o início do período.
+def ler_resumo(conn, nivel, inicio=None, fim=None):
+    tabela, formato = RESUMOS[nivel]
+    condicoes, parametros = [], []
+    if inicio is not None:
+        condicoes.append("periodo >= ?")
+        parametros.append(pd.Timestamp(inicio).strftime(formato))
+    if fim is not None:
+        condicoes.append("periodo <= ?")
+        parametros.append(pd.Timestamp(fim).strftime(formato))
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+    resumo = pd.read_sql(f"SELECT periodo AS date, today, total, co2, trees FROM {tabela} {where} ORDER BY periodo",
+                         conn, params=parametros)
+    resumo["date"] = pd.to_datetime(resumo["date"], format=formato)
+    return resumo
+
+
+# Função para saber se as amostras a partir de uma data ainda estão todas no
+# banco (ou se parte delas já foi apagada pela retenção)
+def cobre_amostras(conn, inicio=None):
+    primeira = conn.execute("SELECT min(data) FROM amostras").fetchone()[0]
+    if primeira is None:
+        return False
+    # Se a primeira hora resumida é a da primeira amostra, nada foi apagado
+    primeira_hora = conn.execute("SELECT min(periodo) FROM resumo_hora").fetchone()[0]
+    if primeira_hora is None or primeira_hora[:13] == primeira[:13]:
+        return True
+    return inicio is not None and pd.Timestamp(inicio) >= datetime.strptime(primeira, FORMATO_BD)
+
+
+# Função para ler a série diária (última amostra de cada dia), a partir do
+# resumo por dia. A série é lida uma vez por versão dos dados e compartilhada
+# pelo processo.
+def ler_diario(conn, inicio=None, fim=None):
+    arquivo = conn.execute("PRAGMA database_list").fetchone()[2]
+    atual = versao(conn)
+    with _lock:
+        anterior = _cache_diario.get(arquivo)
+        if anterior is not None and anterior[0] == atual:
+            diario = anterior[1]
+        else:
+            diario = pd.read_sql('''SELECT ultima AS date, today, total, co2, trees
+                                    FROM resumo_dia ORDER BY periodo''', conn)
+            diario["date"] = pd.to_datetime(diario["date"], format=FORMATO_BD)
+            diario["date_only"] = diario["date"].dt.date
+            _cache_diario[arquivo] = (atual, diario)
+
+    if inicio is not None:
+        diario = diario[diario["date"] >= pd.Timestamp(inicio)]
+    if fim is not None:
+        diario = diario[diario["date"] <= pd.Timestamp(fim)]
+    return diario
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Importa para o banco as leituras do data.csv que ainda não estão nele.")
+    parser.add_argument("-i", "--origem", type=str, default=CAMINHO_DADOS, help="Arquivo CSV de origem")
+    parser.add_argument("--bd", type=str, default=CAMINHO_BD, help="Banco de dados SQLite")
+    parser.add_argument("-r", "--retencao", type=int, default=RETENCAO_DIAS,
+                        help="Dias de amostras mantidos no banco (0 mantém todas)")
+    parser.add_argument("--reconstruir", action="store_true", help="Refaz os resumos a partir das amostras do banco")
+    args = parser.parse_args()
+
+    with closing(nova_conexao(args.bd)) as conn:
+        if args.reconstruir:
+            reconstruir_resumos(conn)
+        print(f"{importar_csv(conn, args.origem)} amostras gravadas em {args.bd}.")
+        print(f"{podar(conn, args.retencao)} amostras anteriores à retenção apagadas.")
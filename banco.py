@@ -0,0 +1,173 @@
+import sqlite3
+import threading
+
+import perfil
+
+CAMINHO_BD = "dados_energia.db"
+
+# Tabelas do sistema, criadas uma única vez por processo
+ESQUEMA = [
+    # Tabela de registros de energia
+    '''CREATE TABLE IF NOT EXISTS registros
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data DATE,
+        co2 REAL,
+        arvores INTEGER,
+        total_energia REAL,
+        energia_diaria REAL,
+        origem TEXT DEFAULT 'manual')''',
+    # Leituras do coletor, uma por momento (ver armazenamento.py)
+    '''CREATE TABLE IF NOT EXISTS amostras
+       (data TEXT PRIMARY KEY,
+        today REAL,
+        total REAL,
+        co2 REAL,
+        trees INTEGER) WITHOUT ROWID''',
+    # Resumos das amostras por hora, dia, mês e ano (ver armazenamento.py)
+    '''CREATE TABLE IF NOT EXISTS resumo_hora
+       (periodo TEXT PRIMARY KEY,
+        ultima TEXT,
+        today REAL,
+        total REAL,
+        co2 REAL,
+        trees INTEGER) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS resumo_dia
+       (periodo TEXT PRIMARY KEY,
+        ultima TEXT,
+        today REAL,
+        total REAL,
+        co2 REAL,
+        trees INTEGER) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS resumo_mes
+       (periodo TEXT PRIMARY KEY,
+        ultima TEXT,
+        today REAL,
+        total REAL,
+        co2 REAL,
+        trees INTEGER) WITHOUT ROWID''',
+    '''CREATE TABLE IF NOT EXISTS resumo_ano
+       (periodo TEXT PRIMARY KEY,
+        ultima TEXT,
+        today REAL,
+        total REAL,
+        co2 REAL,
+        trees INTEGER) WITHOUT ROWID''',
+    # Tabela de usuários
+    '''CREATE TABLE IF NOT EXISTS usuarios
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE,
+        password TEXT,
+        role TEXT)''',
+    # Índice usado na listagem e na paginação dos registros por data
+    'CREATE INDEX IF NOT EXISTS idx_registros_data ON registros (data)',
+]
+
+# Colunas acrescentadas depois da criação das tabelas: (tabela, coluna, definição)
+COLUNAS_NOVAS = [
+    # Registros criados pelo coletor ("coletor") ou pelas telas e importação ("manual")
+    ("registros", "origem", "TEXT DEFAULT 'manual'"),
+]
+
+# Configurações aplicadas a cada conexão aberta.
+# Com WAL, synchronous=NORMAL só sincroniza o disco nos checkpoints.
+PRAGMAS = [
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+]
+
+_lock = threading.Lock()
+_inicializados = set()
+
+
+# Função para montar o nome de um comando SQL nas medições
+def _rotulo(sql):
+    return " ".join(sql.split())[:80]
+
+
+# Cursor que mede cada comando quando o perfil das páginas está ativo (ver perfil.py).
+# Sem o perfil ativo, os comandos são executados sem nenhum trabalho extra.
+class CursorMedido(sqlite3.Cursor):
+
+    def execute(self, sql, parametros=()):
+        if not perfil.ativo():
+            return super().execute(sql, parametros)
+        with perfil.secao(_rotulo(sql), "sql"):
+            return super().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        if not perfil.ativo():
+            return super().executemany(sql, parametros)
+        with perfil.secao(_rotulo(sql), "sql"):
+            return super().executemany(sql, parametros)
+
+    def executescript(self, script):
+        if not perfil.ativo():
+            return super().executescript(script)
+        with perfil.secao(_rotulo(script), "sql"):
+            return super().executescript(script)
+
+
+# Conexão cujos comandos são medidos: os dos cursores (inclusive os de
+# pd.read_sql) e os de conn.execute, que não passa por cursor() no sqlite3
+# e por isso é redirecionado para um cursor medido. Usada só pelas páginas.
+class ConexaoMedida(sqlite3.Connection):
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+# Função para preparar o banco (modo WAL e tabelas) uma vez por processo
+def inicializar_bd(caminho=CAMINHO_BD):
+    with _lock:
+        if caminho in _inicializados:
+            return
+        conn = sqlite3.connect(caminho)
+        try:
+            # O modo WAL fica gravado no arquivo e permite leituras durante escritas
+            conn.execute("PRAGMA journal_mode=WAL")
+            for comando in ESQUEMA:
+                conn.execute(comando)
+            for tabela, coluna, definicao in COLUNAS_NOVAS:
+                existentes = [c[1] for c in conn.execute(f"PRAGMA table_info({tabela})")]
+                if coluna not in existentes:
+                    conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+            conn.commit()
+        finally:
+            conn.close()
+        _inicializados.add(caminho)
+
+
+# Função para abrir uma nova conexão já configurada.
+# factory=ConexaoMedida mede os comandos para o perfil das páginas.
+def nova_conexao(caminho=CAMINHO_BD, factory=sqlite3.Connection):
+    inicializar_bd(caminho)
+    # A conexão é reaproveitada entre execuções da sessão, que podem
+    # acontecer em threads diferentes
+    conn = sqlite3.connect(caminho, check_same_thread=False, factory=factory)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Função para obter a conexão da sessão do Streamlit.
+# A conexão é criada na primeira execução e reaproveitada nas seguintes; os
+# seus comandos aparecem no perfil das páginas (ver perfil.py).
+def conexao_da_sessao(caminho=CAMINHO_BD):
+    # Importado aqui: o coletor, a ingestão e a API usam este módulo sem o Streamlit
+    import streamlit as st
+
+    chave = f"conn:{caminho}"
+    if chave not in st.session_state:
+        st.session_state[chave] = nova_conexao(caminho, ConexaoMedida)
+    return st.session_state[chave]
@@ -0,0 +1,306 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+
+import armazenamento
+import figuras
+import painel
+from amostragem import reduzir
+from armazenamento import FORMATO_BD, ler_diario, reconstruir_resumos
+from banco import nova_conexao
+from dados import CAMINHO_DADOS, COLUNAS, FORMATO_DATA
+from janela_csv import ler_janela
+from registros import atualizar_registro, criar_registro, excluir_registro, ler_registros
+from usuarios import autenticar_usuario, criar_hash, criar_usuario, listar_usuarios
+
+# Tamanhos (linhas) medidos por padrão: de 10^3 a 10^7
+TAMANHOS = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+ANOS = 10
+REPETICOES = 3
+
+# Páginas do App.py e os parâmetros de URL que levam a cada uma
+PAGINAS = {"Home": {}, "Admin": {"Admin": ""}, "User": {"User": ""}}
+PASTA_APP = os.path.dirname(os.path.abspath(__file__))
+
+# Script executado em um processo novo para medir a primeira renderização de
+# uma página. O Streamlit já está carregado antes da medição, como no servidor.
+_SCRIPT_INICIO = """
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(os.path.abspath("App.py"), default_timeout=300)
+for chave, valor in json.loads(sys.argv[1]).items():
+    app.query_params[chave] = valor
+inicio = time.perf_counter()
+app.run()
+print(time.perf_counter() - inicio)
+"""
+
+# Parâmetros da usina sintética: geração diária média (kWh), início do
+# histórico e fatores de conversão para CO2 (t/MWh) e árvores (por MWh)
+GERACAO_DIARIA = 400
+INICIO_HISTORICO = "2015-01-01"
+FATOR_CO2 = 0.4
+FATOR_ARVORES = 55
+
+
+# Função para gerar uma série sintética no formato do data.csv.
+# As amostras ficam entre 6h e 18h, distribuídas pelos dias do período; a
+# geração do dia ("today") cresce em forma de sino ao longo do dia e varia com
+# a estação e o tempo, e o total acumulado soma a geração dos dias anteriores.
+def gerar_serie(linhas, anos=ANOS, semente=0):
+    rng = np.random.default_rng(semente)
+    dias = max(1, min(int(anos * 365), linhas))
+    por_dia = int(np.ceil(linhas / dias))
+    i = np.arange(linhas)
+    dia = i // por_dia
+    fracao = (i % por_dia + 1) / por_dia
+
+    dias_gerados = dia[-1] + 1
+    estacao = 1 + 0.25 * np.cos(2 * np.pi * np.arange(dias_gerados) / 365)
+    clima = rng.uniform(0.3, 1.0, dias_gerados)
+    geracao_dia = GERACAO_DIARIA * estacao * clima
+
+    # Total em MWh no início de cada dia
+    acumulado = np.concatenate([[0], np.cumsum(geracao_dia)[:-1]]) / 1000
+    today = geracao_dia[dia] * (1 - np.cos(np.pi * fracao)) / 2
+    total = acumulado[dia] + today / 1000
+
+    inicio = pd.Timestamp(INICIO_HISTORICO) + pd.Timedelta(hours=6)
+    date = inicio + pd.to_timedelta(dia, unit="D") + pd.to_timedelta(fracao * 12 * 3600, unit="s").round("s")
+    return pd.DataFrame({
+        "date": date,
+        "today": today.round(1),
+        "total": total.round(1),
+        "co2": (total * FATOR_CO2).round(1),
+        "trees": (total * FATOR_ARVORES).astype(int),
+    })
+
+
+# Função para gravar a série sintética como data.csv
+def gravar_csv(serie, caminho):
+    serie[COLUNAS].to_csv(caminho, sep=";", index=False, date_format=FORMATO_DATA)
+
+
+# Função para criar o banco sintético: as amostras da série com os seus
+# resumos, um registro por amostra e um usuário a cada mil registros (no
+# mínimo 10). Um banco de uma execução anterior é apagado antes.
+def gerar_banco(serie, caminho):
+    for arquivo in (caminho, f"{caminho}-wal", f"{caminho}-shm"):
+        if os.path.exists(arquivo):
+            os.remove(arquivo)
+    conn = nova_conexao(caminho)
+    conn.executemany(
+        'INSERT INTO amostras (data, today, total, co2, trees) VALUES (?, ?, ?, ?, ?)',
+        zip(serie["date"].dt.strftime(FORMATO_BD), serie["today"].tolist(), serie["total"].tolist(),
+            serie["co2"].tolist(), serie["trees"].tolist()))
+    conn.commit()
+    reconstruir_resumos(conn)
+    conn.executemany(
+        'INSERT INTO registros (data, co2, arvores, total_energia, energia_diaria) VALUES (?, ?, ?, ?, ?)',
+        zip(serie["date"].dt.strftime("%Y-%m-%d"), serie["co2"].tolist(), serie["trees"].tolist(),
+            serie["total"].tolist(), serie["today"].tolist()))
+    usuarios = max(10, len(serie) // 1000)
+    senha = criar_hash("senha")
+    conn.executemany('INSERT INTO usuarios (username, password, role) VALUES (?, ?, ?)',
+                     ((f"usuario{n}", senha, "user") for n in range(usuarios)))
+    conn.commit()
+    return conn, usuarios
+
+
+# Função para medir uma função várias vezes.
+# preparar() roda antes de cada repetição, fora da medição.
+def medir(funcao, repeticoes=REPETICOES, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+# Função para montar a figura de linhas da página de gráficos (ver
+# streamlit_app2.py), incluindo a serialização enviada ao navegador
+def figura_linhas(serie):
+    linhas = reduzir(serie, "date", ["co2", "trees"])
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=linhas["date"], y=linhas["co2"], mode="lines", name="CO2"))
+    fig.add_trace(go.Scatter(x=linhas["date"], y=linhas["trees"], mode="lines", name="Árvores"))
+    return fig.to_json()
+
+
+# Função para executar todos os casos para um tamanho.
+# Retorna uma lista de resultados (um por caso).
+def medir_tamanho(linhas, pasta, anos=ANOS, repeticoes=REPETICOES):
+    serie = gerar_serie(linhas, anos)
+    caminho_csv = os.path.join(pasta, f"data_{linhas}.csv")
+    gravar_csv(serie, caminho_csv)
+
+    casos = {}
+    # Leitura completa do CSV, com o índice de posições já montado
+    casos["ler_csv_completo"] = medir(lambda: ler_janela(caminho=caminho_csv), repeticoes)
+    data = ler_janela(caminho=caminho_csv)
+    # Últimos 30 dias lidos direto do CSV, com o índice de posições já montado
+    ultimos_dias = data["date"].iloc[-1] - pd.Timedelta(days=30)
+    casos["ler_janela_30_dias"] = medir(lambda: ler_janela(ultimos_dias, caminho=caminho_csv), repeticoes)
+    casos["figura_linhas"] = medir(lambda: figura_linhas(data), repeticoes)
+
+    conn, usuarios = gerar_banco(serie, os.path.join(pasta, f"dados_{linhas}.db"))
+    # Série diária lida pelas páginas e pela ingestão, sem o cache do processo
+    casos["ler_diario"] = medir(lambda: ler_diario(conn), repeticoes,
+                                preparar=armazenamento._cache_diario.clear)
+    diario = ler_diario(conn)
+    # Painel gerado pela ingestão (indicadores, série diária e figura de barras)
+    casos["montar_painel"] = medir(lambda: painel.montar_painel(diario), repeticoes)
+    caminho_painel = os.path.join(pasta, f"painel_{linhas}.json")
+    with open(caminho_painel, "w") as arquivo:
+        json.dump(painel.montar_painel(diario), arquivo, ensure_ascii=False)
+    # Leitura do painel e montagem da figura pela página inicial, sem os caches do processo
+    casos["carregar_painel"] = medir(lambda: painel.carregar_painel(caminho_painel), repeticoes,
+                                     preparar=lambda: painel._cache.pop(caminho_painel, None))
+    retrato = painel.carregar_painel(caminho_painel)
+    # A versão dos dados vem do banco e dos arquivos do benchmark, não dos do repositório
+    versao_bench = [caminho_csv, caminho_painel]
+    casos["figura_do_painel"] = medir(lambda: painel.figura_do_painel(retrato, conn, versao_bench).to_json(),
+                                      repeticoes, preparar=figuras._cache.clear)
+
+    meio = (linhas + 1) // 2
+    ultima_data = serie["date"].iloc[-1].strftime("%Y-%m-%d")
+    casos["criar_registro"] = medir(lambda: criar_registro(conn, ultima_data, 1.0, 1, 1.0, 1.0), repeticoes)
+    casos["atualizar_registro"] = medir(lambda: atualizar_registro(conn, meio, ultima_data, 1.0, 1, 1.0, 1.0), repeticoes)
+    casos["excluir_registro"] = medir(
+        lambda: excluir_registro(conn, meio), repeticoes,
+        preparar=lambda: conn.execute("INSERT OR IGNORE INTO registros (id, data) VALUES (?, ?)", (meio, ultima_data)))
+    casos["ler_registros"] = medir(lambda: ler_registros(conn, 50), repeticoes)
+    cursor = (serie["date"].iloc[meio].strftime("%Y-%m-%d"), meio)
+    casos["ler_registros_meio"] = medir(lambda: ler_registros(conn, 50, cursor), repeticoes)
+    casos["listar_usuarios"] = medir(lambda: listar_usuarios(conn, "usuario1"), repeticoes)
+    casos["criar_usuario"] = medir(
+        lambda: criar_usuario(conn, "bench", "senha", "user"), repeticoes,
+        preparar=lambda: conn.execute("DELETE FROM usuarios WHERE username = 'bench'"))
+    casos["autenticar_usuario"] = medir(lambda: autenticar_usuario(conn, f"usuario{usuarios - 1}", "senha"), repeticoes)
+    conn.close()
+
+    return [
+        {
+            "caso": caso,
+            "linhas": linhas,
+            "anos": anos,
+            "repeticoes": len(tempos),
+            "minimo": min(tempos),
+            "mediana": statistics.median(tempos),
+        }
+        for caso, tempos in casos.items()
+    ]
+
+
+# Função para medir o tempo até a primeira renderização de cada página, cada
+# repetição em um processo novo (imports e caches frios), com os dados reais
+def medir_inicio(paginas=PAGINAS, repeticoes=REPETICOES):
+    with open(os.path.join(PASTA_APP, CAMINHO_DADOS)) as arquivo:
+        linhas = sum(1 for _ in arquivo) - 1
+
+    resultados = []
+    for pagina, parametros in paginas.items():
+        tempos = []
+        for _ in range(repeticoes):
+            processo = subprocess.run([sys.executable, "-c", _SCRIPT_INICIO, json.dumps(parametros)],
+                                      cwd=PASTA_APP, capture_output=True, text=True, check=True)
+            tempos.append(float(processo.stdout.split()[-1]))
+        resultados.append({
+            "caso": f"inicio_{pagina}",
+            "linhas": linhas,
+            "anos": None,
+            "repeticoes": len(tempos),
+            "minimo": min(tempos),
+            "mediana": statistics.median(tempos),
+        })
+    return resultados
+
+
+# Função para identificar a versão do código medida
+def versao():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Função para comparar com um resultado anterior.
+# Retorna os casos cuja mediana cresceu mais que o limite (razão nova/anterior).
+def comparar(resultados, anterior, limite=1.2):
+    base = {(r["caso"], r["linhas"]): r["mediana"] for r in anterior["resultados"]}
+    regressoes = []
+    for r in resultados:
+        chave = (r["caso"], r["linhas"])
+        if chave in base and base[chave] > 0:
+            razao = r["mediana"] / base[chave]
+            print(f"{r['caso']:<22} {r['linhas']:>10}  {razao:6.2f}x")
+            if razao > limite:
+                regressoes.append((*chave, razao))
+    return regressoes
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Mede o desempenho da leitura, consolidação, gráficos e CRUD com dados sintéticos.")
+    parser.add_argument("-n", "--tamanhos", type=int, nargs="+", default=TAMANHOS, help="Quantidades de linhas medidas")
+    parser.add_argument("-a", "--anos", type=float, default=ANOS, help="Anos de histórico da série sintética (1 a 20)")
+    parser.add_argument("-r", "--repeticoes", type=int, default=REPETICOES, help="Repetições de cada caso")
+    parser.add_argument("-o", "--saida", type=str, default="benchmark.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("-c", "--comparar", type=str, help="Resultado anterior (JSON) para comparação")
+    parser.add_argument("--limite", type=float, default=1.2, help="Razão a partir da qual um caso é regressão")
+    parser.add_argument("--pasta", type=str, help="Pasta para os arquivos gerados (padrão: temporária)")
+    parser.add_argument("--inicio", action="store_true",
+                        help="Mede só o tempo até a primeira renderização de cada página do App.py")
+    args = parser.parse_args()
+
+    resultados = []
+    if args.inicio:
+        resultados = medir_inicio(repeticoes=args.repeticoes)
+        for r in resultados:
+            print(f"{r['caso']:<22} {r['linhas']:>10}  {r['mediana'] * 1000:10.2f} ms")
+    else:
+        with tempfile.TemporaryDirectory() as temporaria:
+            pasta = args.pasta or temporaria
+            os.makedirs(pasta, exist_ok=True)
+            for linhas in args.tamanhos:
+                for r in medir_tamanho(linhas, pasta, args.anos, args.repeticoes):
+                    print(f"{r['caso']:<22} {r['linhas']:>10}  {r['mediana'] * 1000:10.2f} ms")
+                    resultados.append(r)
+
+    saida = {
+        "versao": versao(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w") as arquivo:
+        json.dump(saida, arquivo, indent=2)
+    print(f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), args.limite)
+        for caso, linhas, razao in regressoes:
+            print(f"Regressão: {caso} com {linhas} linhas ({razao:.2f}x)")
+        if regressoes:
+            raise SystemExit(1)
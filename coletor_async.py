@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from coletor_http import (PLANTA_PADRAO, URL_GROWATT, anexar, consultar, converter_leitura, formatar_linha,
+                          gravar_no_banco)
+from ingestao import processar
+from log import logger
+
+# Consultas simultâneas no máximo e consultas por segundo para um mesmo servidor
+CONSULTAS_SIMULTANEAS = 8
+CONSULTAS_POR_SEGUNDO = 4
+
+
+# Limita a frequência de consultas por servidor, espaçando os inícios
+class LimitePorHost:
+
+    def __init__(self, por_segundo=CONSULTAS_POR_SEGUNDO):
+        self.intervalo = 1 / por_segundo
+        self._proximo = {}
+        self._lock = asyncio.Lock()
+
+    async def aguardar(self, host):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            agora = loop.time()
+            inicio = max(agora, self._proximo.get(host, agora))
+            self._proximo[host] = inicio + self.intervalo
+        await asyncio.sleep(inicio - agora)
+
+
+# Função para definir o destino de cada usina: a usina padrão vai para o
+# banco (None) e as demais ficam em data_<plantId>.csv, no formato do data.csv
+def caminho_planta(plant_id):
+    if str(plant_id) == PLANTA_PADRAO:
+        return None
+    return f"data_{plant_id}.csv"
+
+
+# Função para consultar uma usina respeitando os limites de concorrência
+async def _consultar_planta(plant_id, url, semaforo, limite):
+    async with semaforo:
+        await limite.aguardar(urlsplit(url).netloc)
+        # A consulta usa a sessão HTTP compartilhada (keep-alive) em uma thread
+        obj = await asyncio.to_thread(consultar, plant_id, url)
+        return converter_leitura(obj)
+
+
+# Função para consultar todas as usinas de uma rodada ao mesmo tempo.
+# As leituras da usina principal vão para o banco, em uma transação, e em
+# seguida a ingestão atualiza o data.csv e o painel da página inicial (ver
+# ingestao.py); as das demais são gravadas com uma única escrita por arquivo.
+# A publicação no repositório fica com o executor (ver executor.py).
+async def coletar_rodada(plantas, url=URL_GROWATT, semaforo=None, limite=None):
+    semaforo = semaforo or asyncio.Semaphore(CONSULTAS_SIMULTANEAS)
+    limite = limite or LimitePorHost()
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(
+        *[_consultar_planta(p, url, semaforo, limite) for p in plantas], return_exceptions=True)
+
+    linhas = defaultdict(list)
+    leituras = []
+    for plant_id, resultado in zip(plantas, resultados):
+        if isinstance(resultado, Exception):
+            logger.error("Erro ao consultar a usina %s: %s", plant_id, resultado)
+            continue
+        caminho = caminho_planta(plant_id)
+        if caminho is None:
+            leituras.append(resultado)
+        else:
+            linhas[caminho].append(formatar_linha(resultado))
+    for caminho, conteudo in linhas.items():
+        anexar(conteudo, caminho)
+    if leituras:
+        gravar_no_banco(leituras)
+        try:
+            await asyncio.to_thread(processar)
+        except Exception as e:
+            logger.error("Erro na ingestão depois da rodada: %s", e)
+
+    gravadas = len(leituras) + sum(len(c) for c in linhas.values())
+    logger.info("Rodada com %s usinas: %s leituras gravadas em %.2f s.",
+                len(plantas), gravadas, time.perf_counter() - inicio)
+    return gravadas
+
+
+# Função para consultar as usinas periodicamente.
+# Cada rodada começa no intervalo seguinte, descontando o tempo da anterior.
+async def monitorar(plantas, intervalo, url=URL_GROWATT):
+    semaforo = asyncio.Semaphore(CONSULTAS_SIMULTANEAS)
+    limite = LimitePorHost()
+    while True:
+        inicio = time.monotonic()
+        await coletar_rodada(plantas, url, semaforo, limite)
+        await asyncio.sleep(max(0, intervalo - (time.monotonic() - inicio)))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Consulta várias usinas Growatt ao mesmo tempo.")
+    parser.add_argument("plantas", nargs="*", default=[PLANTA_PADRAO], help="Identificadores das usinas")
+    parser.add_argument("-u", "--url", type=str, default=URL_GROWATT, help="Endpoint getTotalData")
+    parser.add_argument("-i", "--intervalo", type=int, default=300, help="Intervalo entre rodadas (segundos)")
+    parser.add_argument("--uma-vez", action="store_true", help="Executa uma única rodada e termina")
+    args = parser.parse_args()
+
+    if args.uma_vez:
+        asyncio.run(coletar_rodada(args.plantas, args.url))
+    else:
+        asyncio.run(monitorar(args.plantas, args.intervalo, args.url))
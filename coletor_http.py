@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from armazenamento import gravar_leituras
+from compactacao import anexar_compactado
+from dados import CAMINHO_DADOS, FORMATO_DATA
+from log import logger
+
+# Endpoint do portal Growatt que retorna os totais da usina (ver client.http)
+URL_GROWATT = "https://server.growatt.com/indexbC/getTotalData"
+PLANTA_PADRAO = "181869"
+TEMPO_LIMITE = 30
+
+_sessao = None
+_lock = threading.Lock()
+
+
+# Função para obter a sessão HTTP compartilhada.
+# A sessão mantém as conexões abertas (keep-alive) entre as consultas.
+def obter_sessao():
+    global _sessao
+    with _lock:
+        if _sessao is None:
+            sessao = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=2)
+            sessao.mount("https://", adaptador)
+            sessao.mount("http://", adaptador)
+            _sessao = sessao
+        return _sessao
+
+
+# Função para consultar os totais de uma usina
+def consultar(plant_id=PLANTA_PADRAO, url=URL_GROWATT):
+    resposta = obter_sessao().post(url, json={"plantId": str(plant_id)}, timeout=TEMPO_LIMITE)
+    resposta.raise_for_status()
+    conteudo = resposta.json()
+    if str(conteudo.get("result")) != "1" or "obj" not in conteudo:
+        raise RuntimeError(f"Resposta inesperada do portal para a usina {plant_id}: {conteudo}")
+    return conteudo["obj"]
+
+
+# Função para converter a resposta do portal para o formato do data.csv.
+# eTotal e co2 vêm em kWh e kg e são gravados em MWh e toneladas.
+def converter_leitura(obj, momento=None):
+    momento = momento or datetime.now()
+    return {
+        "date": momento.strftime(FORMATO_DATA),
+        "today": float(obj["eToday"]),
+        "total": round(float(obj["eTotal"]) / 1000, 1),
+        "co2": round(float(obj["co2"]) / 1000, 1),
+        "trees": int(float(obj["tree"])),
+    }
+
+
+# Função para formatar uma leitura como linha do data.csv
+def formatar_linha(leitura):
+    return f"{leitura['date']};{leitura['today']};{leitura['total']};{leitura['co2']};{leitura['trees']}\n"
+
+
+# Função para acrescentar linhas ao data.csv em uma única escrita.
+# Leituras que repetem as anteriores são compactadas (ver compactacao.py).
+def anexar(linhas, caminho=CAMINHO_DADOS):
+    anexar_compactado(linhas, caminho)
+
+
+# Função para gravar no banco as leituras da usina principal (ver armazenamento.py)
+def gravar_no_banco(leituras):
+    gravar_leituras(leituras)
+
+
+# Função para coletar uma leitura e gravá-la no banco ou, se for indicado um
+# caminho, nesse arquivo CSV. O data.csv publicado é gerado a partir do
+# banco pela ingestão (ver ingestao.py).
+def coletar(plant_id=PLANTA_PADRAO, url=URL_GROWATT, caminho=None):
+    leitura = converter_leitura(consultar(plant_id, url))
+    if caminho is None:
+        gravar_no_banco([leitura])
+    else:
+        anexar([formatar_linha(leitura)], caminho)
+    logger.info("Leitura da usina %s gravada: %s", plant_id, leitura)
+    return leitura
+
+
+# Portal local usado na verificação: responde getTotalData com leituras que
+# mudam a cada consulta e registra as conexões e as usinas pedidas
+class _PortalLocal(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    conexoes = set()
+    plantas = []
+
+    def do_POST(self):
+        pedido = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.conexoes.add(self.client_address)
+        self.plantas.append(pedido.get("plantId"))
+        n = len(self.plantas)
+        corpo = json.dumps({"result": 1, "obj": {
+            "eToday": f"{10 + n}.5", "eTotal": "158040", "co2": "63160", "tree": "8688.4"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+# Função para verificar o coletor contra o portal local: as linhas gravadas
+# no CSV têm o formato do data.csv, com as unidades convertidas, e as
+# consultas reaproveitam uma única conexão (keep-alive).
+def verificar(consultas=3):
+    _PortalLocal.conexoes, _PortalLocal.plantas = set(), []
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _PortalLocal)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_port}/indexbC/getTotalData"
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "data.csv")
+            for _ in range(consultas):
+                coletar(PLANTA_PADRAO, url, caminho)
+            with open(caminho) as arquivo:
+                linhas = arquivo.read().splitlines()
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    esperadas = [f"{10 + n}.5;158.0;63.2;8688" for n in range(1, consultas + 1)]
+    formato = re.compile(r"^\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2};")
+    erros = []
+    if linhas[0] != "date;today;total;co2;trees":
+        erros.append(f"cabeçalho inesperado: {linhas[0]}")
+    if [linha.split(";", 1)[1] for linha in linhas[1:]] != esperadas:
+        erros.append(f"linhas inesperadas: {linhas[1:]}")
+    if not all(formato.match(linha) for linha in linhas[1:]):
+        erros.append(f"data fora do formato {FORMATO_DATA}: {linhas[1:]}")
+    if _PortalLocal.plantas != [PLANTA_PADRAO] * consultas:
+        erros.append(f"usinas pedidas: {_PortalLocal.plantas}")
+    if len(_PortalLocal.conexoes) != 1:
+        erros.append(f"{len(_PortalLocal.conexoes)} conexões abertas para {consultas} consultas")
+    if erros:
+        raise RuntimeError("Verificação do coletor falhou: " + "; ".join(erros))
+    return len(linhas) - 1
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Coleta os dados da usina direto do portal Growatt, sem navegador.")
+    parser.add_argument("-p", "--plant-id", type=str, default=PLANTA_PADRAO, help="Identificador da usina")
+    parser.add_argument("-u", "--url", type=str, default=URL_GROWATT, help="Endpoint getTotalData")
+    parser.add_argument("-o", "--saida", type=str, default=None,
+                        help="Arquivo CSV de saída (sem ele, a leitura vai para o banco)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Verifica o coletor contra um portal local, sem acessar o Growatt")
+    args = parser.parse_args()
+
+    if args.verificar:
+        print(f"Coletor verificado: {verificar()} leituras gravadas por uma única conexão.")
+    else:
+        print(coletar(args.plant_id, args.url, args.saida))
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import shutil
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import FORMATO_BD, TAMANHO_LOTE, ler_amostras, versao
+from banco import CAMINHO_BD, nova_conexao
+from dados import COLUNAS
+
+# Armazenamento colunar das amostras do banco: um arquivo binário por coluna
+# (lido com np.memmap) e um meta.json com o número de linhas e a versão do
+# banco (PRAGMA user_version) de que ele foi derivado. É atualizado pela
+# ingestão, só com as amostras novas, e usado nas leituras de séries longas
+# de amostras (API, gráficos de linhas) enquanto estiver em dia com o banco.
+PASTA_COLUNAR = "data_colunar"
+TIPOS = {
+    "date": "datetime64[ns]",
+    "today": "float64",
+    "total": "float64",
+    "co2": "float64",
+    "trees": "float64",
+}
+
+
+# Função para montar o caminho do arquivo de uma coluna
+def _arquivo(pasta, coluna):
+    return os.path.join(pasta, f"{coluna}.bin")
+
+
+# Função para ler os metadados do armazenamento (vazio se não existir)
+def ler_meta(pasta=PASTA_COLUNAR):
+    try:
+        with open(os.path.join(pasta, "meta.json")) as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+# Função para gravar os metadados de forma atômica; os leitores só enxergam
+# as novas linhas depois que os arquivos das colunas já foram gravados
+def _gravar_meta(pasta, meta):
+    temporario = os.path.join(pasta, "meta.json.tmp")
+    with open(temporario, "w") as arquivo:
+        json.dump(meta, arquivo)
+    os.replace(temporario, os.path.join(pasta, "meta.json"))
+
+
+# Função para verificar se o armazenamento corresponde à versão atual do banco
+def atualizado(conn, pasta=PASTA_COLUNAR):
+    meta = ler_meta(pasta)
+    return bool(meta) and meta.get("versao") == versao(conn)
+
+
+# Função para mapear as colunas gravadas sem copiá-las para a memória
+def _mapear(pasta, coluna, linhas):
+    if linhas == 0:
+        return np.empty(0, dtype=TIPOS[coluna])
+    return np.memmap(_arquivo(pasta, coluna), dtype=TIPOS[coluna], mode="r", shape=(linhas,))
+
+
+# Função para gravar valores de uma coluna a partir de uma linha
+def _gravar(pasta, coluna, inicio, valores):
+    modo = "r+b" if os.path.exists(_arquivo(pasta, coluna)) else "wb"
+    with open(_arquivo(pasta, coluna), modo) as arquivo:
+        arquivo.seek(inicio * np.dtype(TIPOS[coluna]).itemsize)
+        arquivo.write(np.ascontiguousarray(valores, dtype=TIPOS[coluna]).tobytes())
+        arquivo.truncate()
+
+
+# Função para obter os valores de uma coluna de um trecho lido do banco
+def _valores(parte, coluna):
+    if coluna == "date":
+        return parte[coluna].to_numpy()
+    return parte[coluna].to_numpy(dtype=TIPOS[coluna], na_value=np.nan)
+
+
+# Função para descobrir quantas linhas gravadas continuam válidas.
+# A retenção do banco apaga as amostras do início (ver armazenamento.podar):
+# as linhas anteriores à primeira amostra do banco são descartadas, movendo
+# as demais para o início dos arquivos. A última linha gravada também é
+# descartada, pois a compactação pode tê-la substituído no banco; a
+# penúltima é a última que nunca é reescrita.
+# Retorna a quantidade de linhas mantidas (0 para refazer tudo).
+def _linhas_mantidas(conn, pasta, linhas):
+    if linhas < 2:
+        return 0
+    primeira = conn.execute("SELECT min(data) FROM amostras").fetchone()[0]
+    if primeira is None:
+        return 0
+    datas = _mapear(pasta, "date", linhas)
+    descartadas = int(np.searchsorted(datas, np.datetime64(pd.Timestamp(primeira), "ns"), "left"))
+    if descartadas >= linhas - 1 or datas[descartadas] != np.datetime64(pd.Timestamp(primeira), "ns"):
+        return 0
+    if descartadas:
+        for coluna in TIPOS:
+            _gravar(pasta, coluna, 0, np.array(_mapear(pasta, coluna, linhas)[descartadas:linhas - 1]))
+    return linhas - 1 - descartadas
+
+
+# Função para atualizar o armazenamento colunar a partir do banco.
+# Só as amostras posteriores à última linha mantida são lidas; se o total
+# não bater com o banco (ex.: amostras antigas acrescentadas), tudo é refeito.
+# Retorna a quantidade de linhas gravadas.
+def converter(conn, pasta=PASTA_COLUNAR):
+    atual = versao(conn)
+    meta = ler_meta(pasta)
+    if meta.get("versao") == atual:
+        return 0
+
+    # Enquanto os arquivos mudam, as leituras usam o banco (ver ler_serie)
+    if meta:
+        _gravar_meta(pasta, {})
+    mantidas = _linhas_mantidas(conn, pasta, meta.get("linhas", 0))
+    if mantidas == 0:
+        shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(pasta, exist_ok=True)
+
+    ultima = None
+    if mantidas:
+        ultima = pd.Timestamp(_mapear(pasta, "date", mantidas)[mantidas - 1]).strftime(FORMATO_BD)
+    linhas = mantidas
+    for parte in pd.read_sql("SELECT data AS date, today, total, co2, trees FROM amostras WHERE data > ? ORDER BY data",
+                             conn, params=(ultima or "",), chunksize=TAMANHO_LOTE):
+        parte["date"] = pd.to_datetime(parte["date"], format=FORMATO_BD)
+        for coluna in TIPOS:
+            _gravar(pasta, coluna, linhas, _valores(parte, coluna))
+        linhas += len(parte)
+    if linhas == mantidas:
+        # Nada novo: os arquivos terminam na última linha mantida
+        for coluna in TIPOS:
+            _gravar(pasta, coluna, linhas, np.empty(0, dtype=TIPOS[coluna]))
+
+    if mantidas and linhas != conn.execute("SELECT count(*) FROM amostras").fetchone()[0]:
+        # Amostras fora da ordem de gravação: o armazenamento é refeito do zero
+        shutil.rmtree(pasta, ignore_errors=True)
+        return converter(conn, pasta)
+    _gravar_meta(pasta, {"linhas": linhas, "versao": atual})
+    return linhas - mantidas
+
+
+# Função para ler colunas do armazenamento colunar.
+# inicio/fim limitam o intervalo de datas (busca binária na coluna date) e
+# apenas as colunas pedidas são mapeadas. Só as linhas do intervalo são
+# copiadas para a memória: os arquivos são reescritos pela ingestão.
+def ler_colunar(colunas=None, inicio=None, fim=None, pasta=PASTA_COLUNAR):
+    colunas = list(colunas or COLUNAS)
+    linhas = ler_meta(pasta).get("linhas", 0)
+    datas = _mapear(pasta, "date", linhas)
+
+    i0 = np.searchsorted(datas, pd.Timestamp(inicio).to_datetime64(), "left") if inicio is not None else 0
+    i1 = np.searchsorted(datas, pd.Timestamp(fim).to_datetime64(), "right") if fim is not None else linhas
+
+    valores = {}
+    for coluna in colunas:
+        if coluna == "date_only":
+            continue
+        mapa = datas if coluna == "date" else _mapear(pasta, coluna, linhas)
+        valores[coluna] = np.array(mapa[i0:i1])
+    data = pd.DataFrame(valores)
+    if "trees" in data and not data["trees"].isna().any():
+        # Como na leitura do banco, trees é inteira se não há valores ausentes
+        data["trees"] = data["trees"].astype("int64")
+    if "date_only" in colunas:
+        # Extrai apenas a data (sem a hora)
+        data["date_only"] = pd.Series(np.array(datas[i0:i1])).dt.date
+    return data
+
+
+# Função para ler as amostras de um período: do armazenamento colunar quando
+# ele está em dia com o banco, senão do próprio banco (ver armazenamento.py)
+def ler_serie(conn, colunas=None, inicio=None, fim=None, pasta=PASTA_COLUNAR):
+    if atualizado(conn, pasta):
+        return ler_colunar(colunas, inicio, fim, pasta)
+    return ler_amostras(conn, colunas, inicio, fim)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Atualiza o armazenamento colunar com as amostras do banco.")
+    parser.add_argument("--bd", type=str, default=CAMINHO_BD, help="Banco de dados SQLite")
+    parser.add_argument("-o", "--pasta", type=str, default=PASTA_COLUNAR, help="Pasta de destino")
+    args = parser.parse_args()
+
+    with closing(nova_conexao(args.bd)) as conn:
+        gravadas = converter(conn, args.pasta)
+    print(f"{gravadas} linhas gravadas em {args.pasta}.")
@@ -0,0 +1,124 @@
+import argparse
+import os
+
+import pandas as pd
+
+from dados import CAMINHO_DADOS, COLUNAS
+
+# Quantidade de bytes lidos do final do arquivo para encontrar as últimas linhas
+TAMANHO_CAUDA = 4096
+
+
+# Função para montar a chave de comparação de uma linha do CSV: o dia e os
+# valores today/total/co2/trees. Amostras seguidas com a mesma chave formam
+# uma sequência, da qual só a primeira e a última são mantidas. O dia faz
+# parte da chave para que a última amostra de cada dia seja sempre mantida.
+def chave_linha(linha):
+    campos = linha.rstrip("\r\n").split(";")
+    valores = []
+    for valor in campos[1:]:
+        try:
+            valores.append(float(valor))
+        except ValueError:
+            valores.append(valor)
+    return (campos[0][:10], tuple(valores))
+
+
+# Função para ler as últimas linhas de dados do arquivo com suas posições.
+# Retorna None se o arquivo não terminar em quebra de linha.
+def _ultimas_linhas(arquivo, tamanho, quantidade=2):
+    inicio = max(0, tamanho - TAMANHO_CAUDA)
+    arquivo.seek(inicio)
+    cauda = arquivo.read()
+    if cauda and not cauda.endswith(b"\n"):
+        return None
+
+    linhas = []
+    fim = len(cauda)
+    while len(linhas) < quantidade and fim > 0:
+        pos = cauda.rfind(b"\n", 0, fim - 1) + 1
+        # Para no cabeçalho ou numa linha cortada no início do trecho lido
+        if pos == 0:
+            break
+        linhas.insert(0, (inicio + pos, cauda[pos:fim].decode()))
+        fim = pos
+    return linhas
+
+
+# Função para ler a data (texto no formato do CSV) da última linha de dados
+# do arquivo. Retorna None se o arquivo não existir ou não tiver dados.
+def ultima_data(caminho=CAMINHO_DADOS):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "rb") as arquivo:
+        tamanho = arquivo.seek(0, os.SEEK_END)
+        arquivo.seek(max(0, tamanho - TAMANHO_CAUDA))
+        linhas = arquivo.read().decode().splitlines()
+    # A primeira linha do trecho pode ser o cabeçalho ou uma linha cortada
+    for linha in reversed(linhas[1:]):
+        if linha.strip():
+            return linha.split(";", 1)[0]
+    return None
+
+
+# Função para acrescentar linhas ao CSV compactando sequências repetidas.
+# Quando uma leitura repete a anterior, a última linha da sequência é
+# substituída pela nova (ficam só a primeira e a última vista).
+def anexar_compactado(linhas, caminho=CAMINHO_DADOS):
+    if not os.path.exists(caminho):
+        with open(caminho, "w", newline="") as arquivo:
+            arquivo.write(";".join(COLUNAS) + "\n")
+
+    with open(caminho, "r+b") as arquivo:
+        tamanho = arquivo.seek(0, os.SEEK_END)
+        cauda = _ultimas_linhas(arquivo, tamanho)
+        prefixo = ""
+        if cauda is None:
+            cauda, prefixo = [], "\n"
+
+        pendentes = [linha for _, linha in cauda]
+        for nova in linhas:
+            if (len(pendentes) >= 2
+                    and chave_linha(pendentes[-1]) == chave_linha(pendentes[-2]) == chave_linha(nova)):
+                pendentes[-1] = nova
+            else:
+                pendentes.append(nova)
+
+        # Regrava a partir da primeira linha da cauda que mudou
+        mudou = next((i for i, (_, linha) in enumerate(cauda) if pendentes[i] != linha), len(cauda))
+        corte = cauda[mudou][0] if mudou < len(cauda) else tamanho
+        arquivo.seek(corte)
+        arquivo.truncate()
+        arquivo.write((prefixo + "".join(pendentes[mudou:])).encode())
+
+
+# Função para compactar todo o histórico de uma vez.
+# Mantém a primeira e a última amostra de cada sequência de valores iguais.
+def compactar_arquivo(caminho=CAMINHO_DADOS):
+    with open(caminho, newline="") as arquivo:
+        cabecalho = arquivo.readline()
+        linhas = arquivo.readlines()
+    if not linhas:
+        return 0, 0
+
+    chaves = pd.Series([chave_linha(linha) for linha in linhas])
+    inicio_sequencia = chaves != chaves.shift(1)
+    fim_sequencia = chaves != chaves.shift(-1)
+    manter = (inicio_sequencia | fim_sequencia).to_numpy()
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", newline="") as arquivo:
+        arquivo.write(cabecalho)
+        arquivo.writelines(linha for linha, m in zip(linhas, manter) if m)
+    os.replace(temporario, caminho)
+    return len(linhas), int(manter.sum())
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Remove do histórico as amostras repetidas no meio de cada sequência.")
+    parser.add_argument("-i", "--origem", type=str, default=CAMINHO_DADOS, help="Arquivo CSV a compactar")
+    args = parser.parse_args()
+
+    antes, depois = compactar_arquivo(args.origem)
+    print(f"{antes} linhas lidas, {depois} mantidas, {antes - depois} removidas.")
@@ -1,54 +1,19 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 
-# Função para criar/conectar ao banco de dados
-def criar_bd():
-    conn = sqlite3.connect('dados_energia.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS registros
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  data DATE,
-                  co2 REAL,
-                  arvores INTEGER,
-                  total_energia REAL,
-                  energia_diaria REAL)''')
-    conn.commit()
-    return conn
+from banco import conexao_da_sessao
+from registros import (atualizar_registro, criar_registro, excluir_registro, pagina_registros,
+                       ultimo_registro)
 
-# Funções CRUD
-def criar_registro(conn, data, co2, arvores, total_energia, energia_diaria):
-    c = conn.cursor()
-    c.execute('''INSERT INTO registros 
-              (data, co2, arvores, total_energia, energia_diaria)
-              VALUES (?, ?, ?, ?, ?)''',
-              (data, co2, arvores, total_energia, energia_diaria))
-    conn.commit()
-
-def ler_registros(conn):
-    return pd.read_sql('SELECT * FROM registros ORDER BY data DESC', conn)
-
-def atualizar_registro(conn, id, data, co2, arvores, total_energia, energia_diaria):
-    c = conn.cursor()
-    c.execute('''UPDATE registros SET
-              data = ?,
-              co2 = ?,
-              arvores = ?,
-              total_energia = ?,
-              energia_diaria = ?
-              WHERE id = ?''',
-              (data, co2, arvores, total_energia, energia_diaria, id))
-    conn.commit()
-
-def excluir_registro(conn, id):
-    c = conn.cursor()
-    c.execute('DELETE FROM registros WHERE id = ?', (id,))
-    conn.commit()
+# Função para conectar ao banco de dados
+# A conexão é compartilhada pela sessão e o esquema é criado uma vez por processo
+def conectar_bd():
+    return conexao_da_sessao()
 
 # Interface Streamlit
 def main():
     st.title("📊 Sistema de Monitoramento de Energia e CO₂")
-    conn = criar_bd()
+    conn = conectar_bd()
 
     menu = ["Adicionar Registro", "Visualizar Registros", "Editar/Excluir Registros"]
     choice = st.sidebar.selectbox("Menu", menu)
@@ -67,7 +32,7 @@ def main():
 
     elif choice == "Visualizar Registros":
         st.subheader("Registros Armazenados")
-        df = ler_registros(conn)
+        df = pagina_registros(conn, 'pagina_visualizar')
         if not df.empty:
             st.dataframe(df.style.format({
                 'co2': '{:.2f} ton',
@@ -75,26 +40,29 @@ def main():
                 'energia_diaria': '{:.2f} kWh/day'
             }), use_container_width=True)
             
-            # Mostrar métricas resumidas
+            # Mostrar métricas resumidas do registro mais recente
+            ultimo = ultimo_registro(conn)
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total CO₂ Compensado", f"{df['co2'].iloc[-1]:.2f} ton")
+                st.metric("Total CO₂ Compensado", f"{ultimo['co2'].iloc[0]:.2f} ton")
             with col2:
-                st.metric("Total de Árvores", f"{df['arvores'].iloc[-1]:,}")
+                st.metric("Total de Árvores", f"{ultimo['arvores'].iloc[0]:,}")
             with col3:
-                st.metric("Energia Total Produzida", f"{df['total_energia'].iloc[-1]:,.2f} kWh")
+                st.metric("Energia Total Produzida", f"{ultimo['total_energia'].iloc[0]:,.2f} kWh")
         else:
             st.warning("Nenhum registro encontrado.")
 
     elif choice == "Editar/Excluir Registros":
         st.subheader("Editar ou Excluir Registros")
-        df = ler_registros(conn)
+        df = pagina_registros(conn, 'pagina_editar')
         
         if not df.empty:
+            # Rótulos das opções montados uma única vez por execução
+            rotulos = dict(zip(df['id'], df['data']))
             registro_selecionado = st.selectbox(
                 "Selecione um registro para editar/excluir",
                 df['id'],
-                format_func=lambda x: f"ID {x} - {df[df['id'] == x]['data'].values[0]}"
+                format_func=lambda x: f"ID {x} - {rotulos[x]}"
             )
             
             registro = df[df['id'] == registro_selecionado].iloc[0]
@@ -123,7 +91,5 @@ def main():
         else:
             st.warning("Nenhum registro encontrado para edição.")
 
-    conn.close()
-
 if __name__ == '__main__':
     main()
\ No newline at end of file
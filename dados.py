@@ -0,0 +1,17 @@
+import pandas as pd
+
+# Formato do data.csv, o histórico publicado no repositório. As páginas leem
+# as leituras do banco (ver armazenamento.py); o arquivo só é lido pela
+# ingestão e pelo benchmark, por janelas de datas (ver janela_csv.py).
+CAMINHO_DADOS = "data.csv"
+COLUNAS = ["date", "today", "total", "co2", "trees"]
+FORMATO_DATA = "%Y/%m/%d %H:%M:%S"
+
+
+# Função para converter as colunas lidas do CSV para os tipos da série
+def tipar_colunas(data):
+    data["date"] = pd.to_datetime(data["date"], format=FORMATO_DATA)
+    # Garante o mesmo tipo em todos os trechos lidos (valores inválidos viram NaN)
+    for coluna in COLUNAS[1:]:
+        data[coluna] = pd.to_numeric(data[coluna], errors="coerce")
+    return data
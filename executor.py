@@ -0,0 +1,127 @@
+import os
+import runpy
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import coletor_http
+from gitrun import publicar
+from ingestao import processar
+from log import logger, medir_etapa
+
+# Intervalo mínimo (em segundos) entre commits de dados; os ciclos dentro
+# do intervalo acumulam as mudanças para o commit seguinte
+JANELA_PUBLICACAO = int(os.environ.get("JANELA_PUBLICACAO", "0"))
+
+# Tempo máximo (em segundos) de cada etapa do ciclo
+TEMPO_LIMITE = {
+    "coleta": 600,
+    "ingestao": 120,
+    "publicacao": 120,
+}
+
+
+# Função para executar o coletor no próprio processo.
+# O script é executado como __main__ (como na linha de comando), mas os módulos
+# que ele importa (selenium etc.) ficam carregados entre os ciclos.
+def coletar():
+    argv = sys.argv
+    sys.argv = ["growatt_automacao.py", "--sem-gui"]
+    try:
+        runpy.run_path("growatt_automacao.py", run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"growatt_automacao.py terminou com código {e.code}")
+    finally:
+        sys.argv = argv
+
+
+# Função para coletar pelo endpoint HTTP do portal, sem navegador
+def coletar_http():
+    coletor_http.coletar()
+    return 1
+
+
+# Função para publicar os dados no repositório
+def publicar_dados():
+    publicar("Data update using git", janela=JANELA_PUBLICACAO)
+
+
+# Etapas padrão de um ciclo: coleta, ingestão e publicação.
+# O coletor é escolhido pela variável de ambiente COLETOR ("selenium" ou "http").
+# O coletor HTTP grava direto no banco; o com navegador escreve no data.csv,
+# cujas linhas novas a ingestão importa para o banco.
+def etapas_padrao(coletor=None):
+    coletor = coletor or os.environ.get("COLETOR", "selenium")
+    return [
+        ("coleta", coletar_http if coletor == "http" else coletar),
+        ("ingestao", processar),
+        ("publicacao", publicar_dados),
+    ]
+
+
+# Executor de longa duração: roda as etapas de cada ciclo como chamadas de
+# função, com tempo limite por etapa, sem sobreposição de ciclos e registrando
+# a duração de cada etapa. Uma etapa com falha interrompe o ciclo.
+class Executor:
+
+    def __init__(self, etapas, tempo_limite=None):
+        self.etapas = etapas
+        self.tempo_limite = TEMPO_LIMITE if tempo_limite is None else tempo_limite
+        self.duracoes = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="etapa")
+        # Etapa que estourou o tempo limite e ainda está rodando
+        self._pendente = None
+
+    # Função para executar uma etapa respeitando o tempo limite.
+    # Se a etapa retornar um número, ele é registrado como linhas processadas.
+    def _executar_etapa(self, nome, funcao):
+        with medir_etapa(nome) as medicao:
+            futuro = self._pool.submit(funcao)
+            try:
+                retorno = futuro.result(timeout=self.tempo_limite.get(nome))
+            except TimeoutError:
+                self._pendente = (nome, futuro)
+                medicao.resultado = "tempo_esgotado"
+                logger.error("Etapa %s excedeu o tempo limite de %s s.", nome, self.tempo_limite.get(nome))
+            except Exception as e:
+                medicao.resultado = "erro"
+                logger.error("Erro na etapa %s: %s", nome, e)
+            else:
+                if isinstance(retorno, int) and not isinstance(retorno, bool):
+                    medicao.linhas = retorno
+        self.duracoes[nome] = medicao.duracao
+        return medicao.resultado == "ok"
+
+    # Função para executar um ciclo completo.
+    # Retorna True se todas as etapas terminaram com sucesso.
+    def executar(self):
+        if not self._lock.acquire(blocking=False):
+            logger.warning("Ciclo anterior ainda em execução. Ciclo ignorado.")
+            return False
+        try:
+            if self._pendente is not None:
+                nome, futuro = self._pendente
+                if not futuro.done():
+                    logger.warning("Etapa %s do ciclo anterior ainda em execução. Ciclo ignorado.", nome)
+                    return False
+                self._pendente = None
+
+            self.duracoes = {}
+            inicio = time.perf_counter()
+            for nome, funcao in self.etapas:
+                if not self._executar_etapa(nome, funcao):
+                    logger.error("Ciclo interrompido na etapa %s.", nome)
+                    return False
+            logger.info("Ciclo concluído em %.2f s.", time.perf_counter() - inicio)
+            return True
+        finally:
+            self._lock.release()
+
+
+if __name__ == "__main__":
+    logger.info("Iniciando execução...")
+    Executor(etapas_padrao()).executar()
+    logger.info("Execução finalizada.")
@@ -0,0 +1,68 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import closing
+
+from dados import CAMINHO_DADOS
+from painel import CAMINHO_PAINEL
+
+# Cache de figuras compartilhado por todas as sessões do processo.
+# Cada figura é guardada por nome e opções (período, colunas etc.) e vale
+# para uma versão dos dados; quando os dados mudam, o cache é esvaziado.
+# As figuras devolvidas são compartilhadas: quem as usa não deve alterá-las.
+MAXIMO_FIGURAS = 64
+
+# Arquivos cuja mudança indica uma nova versão dos dados, além da versão do
+# banco (PRAGMA user_version, ver armazenamento.py)
+CAMINHOS_VERSAO = [CAMINHO_DADOS, CAMINHO_PAINEL]
+
+_cache = OrderedDict()
+_versao = None
+_lock = threading.Lock()
+
+
+# Função para obter a versão atual dos dados: a versão do banco e o tamanho
+# e a data de modificação dos arquivos de dados. Sem uma conexão, o banco é
+# consultado por uma conexão aberta só para isso.
+def versao_dados(conn=None, caminhos=CAMINHOS_VERSAO):
+    from armazenamento import versao as versao_banco
+    from banco import nova_conexao
+
+    if conn is None:
+        with closing(nova_conexao()) as temporaria:
+            versao = [versao_banco(temporaria)]
+    else:
+        versao = [versao_banco(conn)]
+    for caminho in caminhos:
+        try:
+            stat = os.stat(caminho)
+            versao.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            versao.append(None)
+    return tuple(versao)
+
+
+# Função para obter uma figura do cache ou montá-la com construir().
+# As opções precisam ser hasheáveis (tuplas, datas, textos). conn é a
+# conexão da sessão, usada para obter a versão do banco; caminhos troca os
+# arquivos de dados que entram na versão (ex.: os do benchmark).
+def figura_em_cache(nome, opcoes, construir, conn=None, caminhos=None):
+    global _versao
+    versao = versao_dados(conn, CAMINHOS_VERSAO if caminhos is None else caminhos)
+    chave = (nome, opcoes)
+    with _lock:
+        if versao != _versao:
+            _cache.clear()
+            _versao = versao
+        if chave in _cache:
+            _cache.move_to_end(chave)
+            return _cache[chave]
+
+    # A figura é montada fora do lock para não bloquear as outras sessões
+    figura = construir()
+    with _lock:
+        if versao == _versao:
+            _cache[chave] = figura
+            while len(_cache) > MAXIMO_FIGURAS:
+                _cache.popitem(last=False)
+    return figura
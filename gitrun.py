@@ -1,45 +1,70 @@
 import git
+import logging
+import time
 from pathlib import Path
 from log import logger
 import argparse
 
+# Arquivos de dados publicados no repositório
+CAMINHOS_DADOS = ["data.csv", "data_painel.json"]
 
-if __name__ == "__main__":
 
-    parser = argparse.ArgumentParser(description='Commit and push changes to a git repository.')
-    parser.add_argument("-m","--message", type=str, help='Commit message', required=True)
-    args = parser.parse_args()
+# Função para listar os arquivos de dados com mudanças.
+# Verifica apenas os caminhos de dados, sem percorrer toda a árvore de trabalho.
+def arquivos_modificados(repo, caminhos=CAMINHOS_DADOS):
+    saida = repo.git.status("--porcelain", "--untracked-files=all", "--", *caminhos)
+    return [linha[3:] for linha in saida.splitlines()]
+
 
+# Função para comitar e enviar os dados para o repositório remoto.
+# Com janela > 0, as mudanças se acumulam e só são publicadas quando o último
+# commit tiver mais de `janela` segundos, juntando vários ciclos de coleta.
+def publicar(mensagem, repo_path='./', janela=0):
     # Caminho para o diretório do repositório Git
-    repo_path = './'
     repo = git.Repo(repo_path)
 
-    # Verifica se existem modificações no repositório
-    if repo.is_dirty(untracked_files=True):
-        # Adiciona todos os arquivos modificados e não rastreados
-        # repo.git.add(all=True)
+    # Verifica se existem modificações nos arquivos de dados
+    modificados = arquivos_modificados(repo)
+    if not modificados:
+        logger.info("Não há mudanças para comitar.")
+        print("Não há mudanças para comitar.")
+        return False
 
-        # command: git add ./data.csv
-        repo.git.add(["./data.csv"])
+    if janela > 0:
+        decorrido = time.time() - repo.head.commit.committed_date
+        if decorrido < janela:
+            logger.info("Publicação adiada: último commit há %.0f s (janela de %s s).", decorrido, janela)
+            return False
 
-        # Faz o commit
-        # command: git commit -m "Data update using git 
-        commit = repo.index.commit(args.message)
+    # command: git add ./data.csv ./data_painel.json
+    repo.git.add(modificados)
 
-        # Opcional: Push para o repositório remoto
-        origin = repo.remote(name='origin')
+    # Faz o commit
+    # command: git commit -m "Data update using git 
+    commit = repo.index.commit(mensagem)
 
-        # command: git push origin master
-        origin.push()
+    # Opcional: Push para o repositório remoto
+    origin = repo.remote(name='origin')
 
-        # Obtém os arquivos que foram comitados
-        comitados = list(commit.stats.files.keys())
+    # command: git push origin master
+    origin.push()
 
-        # Printar os arquivos comitados após o push
-        if comitados:
-            for file in comitados:
-                logger.info("Arquivo comitado: %s", file)    
+    for file in modificados:
+        logger.info("Arquivo comitado: %s", file)
 
-    else:
-        logger.info("Não há mudanças para comitar.")
-        print("Não há mudanças para comitar.")
+    # As estatísticas comparam os arquivos inteiros; só são calculadas com LOG_NIVEL=DEBUG
+    if logger.isEnabledFor(logging.DEBUG):
+        for file, stats in commit.stats.files.items():
+            logger.debug("Estatísticas de %s: %s", file, stats)
+
+    return True
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Commit and push changes to a git repository.')
+    parser.add_argument("-m","--message", type=str, help='Commit message', required=True)
+    parser.add_argument("-j","--janela", type=int, default=0, help='Minimum seconds between data commits')
+    args = parser.parse_args()
+
+    publicar(args.message, janela=args.janela)
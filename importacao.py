@@ -0,0 +1,108 @@
+import argparse
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from banco import CAMINHO_BD, nova_conexao
+
+# Colunas esperadas no arquivo de importação (mesmas da tabela registros)
+COLUNAS_REGISTRO = ["data", "co2", "arvores", "total_energia", "energia_diaria"]
+COLUNAS_NUMERICAS = ["co2", "arvores", "total_energia", "energia_diaria"]
+
+
+# Função para ler um arquivo CSV ou XLSX em um DataFrame de texto
+def ler_arquivo(conteudo, nome):
+    if nome.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(BytesIO(conteudo), dtype=str)
+    # O separador é deduzido pela primeira linha (";" como no data.csv ou ",")
+    cabecalho = conteudo.split(b"\n", 1)[0]
+    sep = ";" if b";" in cabecalho else ","
+    return pd.read_csv(BytesIO(conteudo), sep=sep, dtype=str)
+
+
+# Função para converter as datas aceitando AAAA-MM-DD e DD/MM/AAAA
+def _converter_datas(valores):
+    datas = pd.to_datetime(valores, format="ISO8601", errors="coerce")
+    faltando = datas.isna() & valores.notna()
+    if faltando.any():
+        datas[faltando] = pd.to_datetime(valores[faltando], format="%d/%m/%Y", errors="coerce")
+    return datas
+
+
+# Função para validar os registros de uma vez, coluna a coluna.
+# Retorna os registros válidos (prontos para inserir) e os rejeitados com o motivo.
+def validar_registros(df):
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    faltando = [c for c in COLUNAS_REGISTRO if c not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltando)}")
+    df = df[COLUNAS_REGISTRO]
+
+    datas = _converter_datas(df["data"].str.strip())
+    numeros = df[COLUNAS_NUMERICAS].apply(
+        lambda coluna: pd.to_numeric(coluna.str.strip().str.replace(",", ".", regex=False), errors="coerce"))
+
+    motivo = pd.Series("", index=df.index)
+    motivo[datas.isna()] += "data inválida; "
+    motivo[numeros.isna().any(axis=1)] += "valor numérico inválido; "
+    motivo[(numeros < 0).any(axis=1)] += "valor negativo; "
+    motivo[numeros["arvores"].notna() & (numeros["arvores"] % 1 != 0)] += "árvores não inteiro; "
+    rejeitado = motivo != ""
+
+    validos = numeros[~rejeitado].copy()
+    validos.insert(0, "data", datas[~rejeitado].dt.strftime("%Y-%m-%d"))
+    validos["arvores"] = validos["arvores"].astype("int64")
+
+    rejeitados = df[rejeitado].assign(motivo=motivo[rejeitado].str.rstrip("; "))
+    # Linha correspondente no arquivo (cabeçalho na linha 1)
+    rejeitados.insert(0, "linha", rejeitados.index + 2)
+    return validos, rejeitados
+
+
+# Função para inserir os registros válidos em uma única transação
+def inserir_registros(conn, validos):
+    linhas = list(validos[COLUNAS_REGISTRO].itertuples(index=False, name=None))
+    with conn:
+        conn.executemany('''INSERT INTO registros
+                            (data, co2, arvores, total_energia, energia_diaria)
+                            VALUES (?, ?, ?, ?, ?)''', linhas)
+    return len(linhas)
+
+
+# Função para importar um arquivo de registros.
+# Retorna um resumo com inseridos, rejeitados e a taxa em linhas por segundo.
+def importar_registros(conn, conteudo, nome):
+    inicio = time.perf_counter()
+    df = ler_arquivo(conteudo, nome)
+    validos, rejeitados = validar_registros(df)
+    inseridos = inserir_registros(conn, validos)
+    segundos = time.perf_counter() - inicio
+    return {
+        "inseridos": inseridos,
+        "rejeitados": rejeitados,
+        "segundos": segundos,
+        "linhas_por_segundo": len(df) / segundos if segundos > 0 else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Importa registros de energia de um arquivo CSV/XLSX.")
+    parser.add_argument("arquivo", type=str, help="Arquivo CSV ou XLSX com as colunas " + ", ".join(COLUNAS_REGISTRO))
+    parser.add_argument("--bd", type=str, default=CAMINHO_BD, help="Banco de dados SQLite")
+    args = parser.parse_args()
+
+    with open(args.arquivo, "rb") as arquivo:
+        conteudo = arquivo.read()
+
+    conn = nova_conexao(args.bd)
+    resumo = importar_registros(conn, conteudo, args.arquivo)
+    conn.close()
+
+    print(f"{resumo['inseridos']} registros inseridos em {resumo['segundos']:.2f} s "
+          f"({resumo['linhas_por_segundo']:,.0f} linhas/s).")
+    rejeitados = resumo["rejeitados"]
+    if not rejeitados.empty:
+        print(f"{len(rejeitados)} linhas rejeitadas:")
+        print(rejeitados.to_string(index=False))
@@ -0,0 +1,35 @@
+from contextlib import closing
+
+from armazenamento import exportar_csv, importar_csv, podar
+from banco import nova_conexao
+from colunar import converter
+from log import logger
+from painel import gerar_painel
+
+
+# Função para processar os dados depois de cada coleta.
+# O banco é o destino das leituras; o data.csv publicado e o painel da página
+# inicial são gerados a partir dele. Antes, as linhas do data.csv posteriores
+# à última amostra do banco são importadas: as do coletor com navegador, que
+# só escreve no arquivo, e todo o histórico quando o banco é novo. Com o banco
+# em dia, a importação só lê o fim do arquivo. Por fim, as amostras novas
+# são acrescentadas ao armazenamento colunar (ver colunar.py).
+# Retorna a quantidade de amostras novas gravadas no banco.
+def processar():
+    with closing(nova_conexao()) as conn:
+        amostras = importar_csv(conn)
+        apagadas = podar(conn)
+        exportadas = exportar_csv(conn)
+        colunares = converter(conn)
+    logger.info("Banco de amostras atualizado: %s amostras importadas do data.csv, %s apagadas pela retenção.",
+                amostras, apagadas)
+    logger.info("Histórico publicado atualizado: %s amostras acrescentadas ao data.csv.", exportadas)
+    logger.info("Armazenamento colunar atualizado: %s linhas gravadas.", colunares)
+
+    painel = gerar_painel()
+    logger.info("Painel da página inicial atualizado: versão %s.", painel["versao"])
+    return amostras
+
+
+if __name__ == "__main__":
+    processar()
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+import pandas as pd
+
+from dados import CAMINHO_DADOS, COLUNAS, FORMATO_DATA, tipar_colunas
+
+# Leitura de uma janela de datas do data.csv sem carregar o histórico inteiro.
+# Um índice ao lado do arquivo (data.csv.idx) guarda a data e a posição (em
+# bytes) do início de cada bloco de linhas; a leitura começa no bloco que
+# contém o início da janela, para no primeiro bloco depois do fim e converte
+# o trecho em partes. O índice é atualizado só com as linhas novas.
+
+# Quantidade de linhas por bloco do índice
+LINHAS_POR_BLOCO = 1000
+# Quantidade de linhas convertidas por vez na leitura
+LINHAS_POR_PARTE = 100_000
+# Bytes lidos por vez na montagem do índice
+TAMANHO_LEITURA = 4 * 1024 * 1024
+# Bytes anteriores ao último bloco usados para verificar se o arquivo foi reescrito
+TAMANHO_ANCORA = 64
+# As datas do arquivo (FORMATO_DATA) têm tamanho fixo e são ordenáveis como texto
+TAMANHO_DATA = 19
+
+# Cache por processo: caminho -> índice
+_cache = {}
+_lock = threading.Lock()
+
+
+# Função para montar o caminho do índice de um arquivo
+def caminho_indice(caminho):
+    return f"{caminho}.idx"
+
+
+# Função para ler o índice gravado (None se não existir ou for de outro passo)
+def _ler_indice(caminho):
+    try:
+        with open(caminho_indice(caminho)) as arquivo:
+            indice = json.load(arquivo)
+    except (FileNotFoundError, ValueError):
+        return None
+    return indice if indice.get("passo") == LINHAS_POR_BLOCO else None
+
+
+# Função para gravar o índice de forma atômica
+def _gravar_indice(caminho, indice):
+    temporario = f"{caminho_indice(caminho)}.tmp"
+    with open(temporario, "w") as arquivo:
+        json.dump(indice, arquivo)
+    os.replace(temporario, caminho_indice(caminho))
+
+
+# Função para ler os bytes anteriores a uma posição do arquivo
+def _ler_ancora(arquivo, posicao):
+    inicio = max(0, posicao - TAMANHO_ANCORA)
+    arquivo.seek(inicio)
+    return arquivo.read(posicao - inicio).hex()
+
+
+# Função para percorrer o arquivo a partir do início de um bloco e listar os
+# inícios dos blocos seguintes. Só linhas completas (com "\n") são indexadas.
+def _varrer(arquivo, inicio):
+    arquivo.seek(inicio)
+    posicoes, linhas, base, fim_completo = [inicio], 0, inicio, inicio
+    while True:
+        trecho = arquivo.read(TAMANHO_LEITURA)
+        if not trecho:
+            break
+        quebras = np.flatnonzero(np.frombuffer(trecho, dtype=np.uint8) == ord("\n"))
+        if len(quebras):
+            # A linha de número k (a partir do bloco inicial) começa depois da quebra k - 1
+            numeros = linhas + 1 + np.arange(len(quebras))
+            posicoes.extend((base + quebras[numeros % LINHAS_POR_BLOCO == 0] + 1).tolist())
+            linhas += len(quebras)
+            fim_completo = base + int(quebras[-1]) + 1
+        base += len(trecho)
+
+    # Um bloco que começaria na linha incompleta (ou no fim do arquivo) fica para depois
+    posicoes = [p for p in posicoes if p < fim_completo]
+    datas = []
+    for posicao in posicoes:
+        arquivo.seek(posicao)
+        datas.append(arquivo.read(TAMANHO_DATA).decode())
+    return posicoes, datas, fim_completo
+
+
+# Função para atualizar o índice de um arquivo.
+# O último bloco conhecido é sempre varrido de novo, pois o coletor pode ter
+# reescrito as últimas linhas (ver compactacao.py); se o trecho anterior a ele
+# mudou, o índice é refeito do início.
+def atualizar_indice(caminho=CAMINHO_DADOS):
+    stat = os.stat(caminho)
+    origem = [stat.st_size, stat.st_mtime_ns]
+    with _lock:
+        indice = _cache.get(caminho) or _ler_indice(caminho)
+        if indice is not None and indice["origem"] == origem:
+            _cache[caminho] = indice
+            return indice
+        # O índice em uso por outras leituras não é alterado
+        indice = dict(indice) if indice is not None else None
+
+        with open(caminho, "rb") as arquivo:
+            ultimo = indice["posicoes"][-1] if indice and indice["posicoes"] else None
+            if ultimo is None or ultimo > stat.st_size or _ler_ancora(arquivo, ultimo) != indice["ancora"]:
+                # Índice novo: o primeiro bloco começa depois do cabeçalho
+                arquivo.seek(0)
+                cabecalho = arquivo.readline()
+                indice = {"passo": LINHAS_POR_BLOCO, "posicoes": [], "datas": [], "ordenado": True}
+                ultimo = len(cabecalho) if cabecalho.endswith(b"\n") else None
+
+            if ultimo is not None:
+                posicoes, datas, fim = _varrer(arquivo, ultimo)
+                indice["posicoes"] = indice["posicoes"][:-1] + posicoes if indice["posicoes"] else posicoes
+                indice["datas"] = indice["datas"][:-1] + datas if indice["datas"] else datas
+                indice["fim"] = fim
+                if indice["posicoes"]:
+                    indice["ancora"] = _ler_ancora(arquivo, indice["posicoes"][-1])
+            # Com datas fora de ordem (ex.: histórico importado), a janela não pode
+            # ser localizada pelo índice e o arquivo é lido inteiro, em partes
+            indice["ordenado"] = all(a <= b for a, b in zip(indice["datas"], indice["datas"][1:]))
+
+        indice["origem"] = origem
+        _gravar_indice(caminho, indice)
+        _cache[caminho] = indice
+        return indice
+
+
+# Arquivo limitado a um trecho [posição atual, fim), lido em partes pelo pandas
+class _Trecho:
+
+    def __init__(self, arquivo, fim):
+        self.arquivo = arquivo
+        self.fim = fim
+
+    def read(self, tamanho=-1):
+        restante = max(0, self.fim - self.arquivo.tell())
+        if tamanho is None or tamanho < 0 or tamanho > restante:
+            tamanho = restante
+        return self.arquivo.read(tamanho)
+
+
+# Função para ler as linhas de uma janela de datas (inicio/fim inclusive).
+# Só os blocos que podem ter linhas da janela são lidos, em partes de
+# LINHAS_POR_PARTE linhas; cada parte é filtrada antes de ser guardada.
+def ler_janela(inicio=None, fim=None, colunas=None, caminho=CAMINHO_DADOS):
+    indice = atualizar_indice(caminho)
+    posicoes, datas = indice["posicoes"], indice["datas"]
+    primeiro, ultimo = 0, len(posicoes)
+    if indice["ordenado"]:
+        if inicio is not None:
+            # Bloco anterior ao primeiro que começa em inicio ou depois
+            primeiro = max(0, bisect_left(datas, pd.Timestamp(inicio).strftime(FORMATO_DATA)) - 1)
+        if fim is not None:
+            ultimo = bisect_right(datas, pd.Timestamp(fim).strftime(FORMATO_DATA))
+
+    partes = []
+    if primeiro < ultimo:
+        limite = posicoes[ultimo] if ultimo < len(posicoes) else indice.get("fim", 0)
+        with open(caminho, "rb") as arquivo:
+            arquivo.seek(posicoes[primeiro])
+            for parte in pd.read_csv(_Trecho(arquivo, limite), sep=";", header=None, names=COLUNAS,
+                                     chunksize=LINHAS_POR_PARTE):
+                parte = tipar_colunas(parte)
+                if inicio is not None:
+                    parte = parte[parte["date"] >= pd.Timestamp(inicio)]
+                if fim is not None:
+                    parte = parte[parte["date"] <= pd.Timestamp(fim)]
+                partes.append(parte)
+
+    if partes:
+        data = pd.concat(partes, ignore_index=True)
+    else:
+        data = tipar_colunas(pd.DataFrame({coluna: [] for coluna in COLUNAS}))
+    if colunas is None or "date_only" in colunas:
+        # Extrai apenas a data (sem a hora)
+        data["date_only"] = data["date"].dt.date
+    if colunas is not None:
+        data = data[list(colunas)]
+    return data
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Lê uma janela de datas do data.csv usando o índice de posições.")
+    parser.add_argument("-i", "--origem", type=str, default=CAMINHO_DADOS, help="Arquivo CSV")
+    parser.add_argument("--inicio", type=str, help="Data inicial (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=str, help="Data final (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    indice = atualizar_indice(args.origem)
+    print(f"Índice com {len(indice['posicoes'])} blocos de {LINHAS_POR_BLOCO} linhas.")
+    print(ler_janela(args.inicio, args.fim, caminho=args.origem))
@@ -1,18 +1,97 @@
+import atexit
+import copy
+import json
 import logging 
+import os
+import queue
+import time
+from contextlib import ContextDecorator
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
-# Configurando o logging para gravar em umcon arquivo
+# Configurando o logging para gravar em um arquivo.
+# As chamadas de log só colocam o registro em uma fila; a escrita no arquivo
+# é feita por um thread separado (QueueListener).
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# Nível mínimo gravado (LOG_NIVEL=DEBUG inclui, por exemplo, as estatísticas
+# de cada commit de dados, ver gitrun.py)
+NIVEL = getattr(logging, os.environ.get("LOG_NIVEL", "INFO").upper(), logging.INFO)
+logger.setLevel(NIVEL)
 
-# Criação de um handler para escrever os logs em um arquivo
-file_handler = logging.FileHandler('./logs.log')
-file_handler.setLevel(logging.INFO)
+# Campos extras gravados pelas medições de etapa
+CAMPOS_ETAPA = ("etapa", "duracao", "linhas", "resultado")
 
-# Criação de um formatter e adicionando ao handler
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+# Formatter que grava cada registro como uma linha JSON
+class FormatoJson(logging.Formatter):
+
+    def format(self, record):
+        registro = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for campo in CAMPOS_ETAPA:
+            if hasattr(record, campo):
+                registro[campo] = getattr(record, campo)
+        if record.exc_info:
+            registro["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False)
+
+
+# Criação de um handler para escrever os logs em um arquivo, com rotação
+# (tamanho máximo e quantidade de arquivos antigos configuráveis). A rotação
+# não é segura entre processos: cada serviço deve usar o seu arquivo (LOG_ARQUIVO).
+file_handler = RotatingFileHandler(
+    os.environ.get("LOG_ARQUIVO", './logs.log'),
+    maxBytes=int(os.environ.get("LOG_MAX_BYTES", 5 * 1024 * 1024)),
+    backupCount=int(os.environ.get("LOG_BACKUPS", 5)),
+    encoding='utf-8',
+)
+file_handler.setLevel(NIVEL)
+
+# Criação de um formatter e adicionando ao handler (JSON com LOG_JSON=1)
+if os.environ.get("LOG_JSON") == "1":
+    formatter = FormatoJson()
+else:
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 
-# Adicionando o handler ao logger
-logger.addHandler(file_handler)
+# Adicionando o handler ao logger por meio da fila
+fila_logs = queue.SimpleQueue()
+listener = QueueListener(fila_logs, file_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+logger.addHandler(QueueHandler(fila_logs))
+
+
+# Mede a duração de uma etapa do pipeline (coleta, processamento, publicação)
+# e registra duração, linhas processadas e resultado. Pode ser usada como
+# contexto (with medir_etapa("coleta") as m: ... m.linhas = n) ou decorador.
+class medir_etapa(ContextDecorator):
+
+    def __init__(self, etapa):
+        self.etapa = etapa
+        self.linhas = None
+        self.resultado = None
+        self.duracao = None
+
+    # Cada uso como decorador recebe uma medição nova
+    def _recreate_cm(self):
+        return copy.copy(self)
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
 
+    def __exit__(self, tipo, valor, tb):
+        self.duracao = time.perf_counter() - self._inicio
+        if self.resultado is None:
+            self.resultado = "ok" if tipo is None else "erro"
+        detalhe = "" if self.linhas is None else f" ({self.linhas} linhas)"
+        logger.info(
+            "Etapa %s: %s em %.3f s%s", self.etapa, self.resultado, self.duracao, detalhe,
+            extra={"etapa": self.etapa, "duracao": round(self.duracao, 6),
+                   "linhas": self.linhas, "resultado": self.resultado},
+        )
+        return False
@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+# Retrato do painel da página inicial: indicadores, série diária e a figura
+# de barras já serializada. É gerado pela ingestão depois de cada atualização
+# e publicado junto com os dados, para que cada visitante só leia o arquivo.
+# Os módulos de dados (pandas) e de gráficos só são importados para gerar o
+# painel; a página inicial não precisa deles para exibi-lo.
+CAMINHO_PAINEL = "data_painel.json"
+
+# Versão do formato do arquivo; um arquivo de outra versão é gerado de novo
+FORMATO = 1
+
+# Cache por processo: caminho -> ((tamanho, mtime), painel)
+_cache = {}
+_lock = threading.Lock()
+
+
+# Função para montar a figura de barras da geração diária
+def figura_barras(diario):
+    import plotly.express as px
+
+    from amostragem import agrupar_barras, titulo_periodo
+
+    # Limita a quantidade de barras enviadas ao navegador, somando os dias por
+    # semana, mês ou ano quando passam do limite (ver amostragem.py)
+    bar_data, periodo = agrupar_barras(diario, "date_only", "today")
+    fig_bar = px.bar(
+        bar_data,
+        x="date_only",
+        y="today",
+        title=" ",
+        labels={"date_only": titulo_periodo(periodo), "today": "Geração de Energia (kWh)"},
+        text="today",  # Exibe os valores de 'today' dentro das barras
+    )
+
+    # Ajustar o tamanho da fonte e o estilo do texto nas barras
+    fig_bar.update_traces(
+        textfont_size=16,  # Tamanho da fonte dos valores
+        textposition="inside",  # Posiciona o texto dentro das barras
+        insidetextanchor="middle",  # Centraliza o texto dentro das barras
+        textfont_color="white",  # Cor do texto (branco para contraste)
+    )
+
+    # Ajustar o layout do gráfico de barras
+    fig_bar.update_layout(
+        title_font_size=24,  # Título maior
+        xaxis_title_font_size=20,  # Título do eixo X maior
+        yaxis_title_font_size=20,  # Título do eixo Y maior
+        xaxis_tickfont_size=14,  # Valores do eixo X maiores
+        yaxis_tickfont_size=14,  # Valores do eixo Y maiores
+        uniformtext_minsize=12,  # Tamanho mínimo do texto
+        uniformtext_mode="hide",  # Esconde texto que não couber
+        xaxis_tickformat="%d-%m-%Y",  # Formata o eixo X para exibir apenas a data
+    )
+    return fig_bar
+
+
+# Função para calcular o painel a partir da série diária.
+# A versão é um resumo do conteúdo da série: muda sempre que os dados mudam.
+def montar_painel(diario):
+    from dados import COLUNAS
+
+    ultima = diario.iloc[-1]
+    serie = diario[COLUNAS].assign(date=diario["date"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    return {
+        "formato": FORMATO,
+        "versao": hashlib.sha1(serie.to_csv(index=False).encode()).hexdigest()[:12],
+        "kpis": {
+            "ultima_leitura": ultima["date"].isoformat(),
+            "total": float(ultima["total"]),
+            "co2": float(ultima["co2"]),
+            "trees": float(ultima["trees"]),
+        },
+        "diario": serie.to_dict(orient="list"),
+        "figura_barras": json.loads(figura_barras(diario).to_json()),
+    }
+
+
+# Função para gerar o painel e gravá-lo de forma atômica
+def gerar_painel(destino=CAMINHO_PAINEL):
+    from contextlib import closing
+
+    from armazenamento import ler_diario
+    from banco import nova_conexao
+
+    with closing(nova_conexao()) as conn:
+        painel = montar_painel(ler_diario(conn))
+    temporario = f"{destino}.tmp"
+    with open(temporario, "w") as arquivo:
+        json.dump(painel, arquivo, ensure_ascii=False)
+    os.replace(temporario, destino)
+    return painel
+
+
+# Função usada pela página inicial para obter o painel.
+# O arquivo é lido uma vez por processo e relido só quando muda; se ainda não
+# existir (ou for de outro formato), é gerado a partir da série diária do banco.
+def carregar_painel(caminho=CAMINHO_PAINEL):
+    with _lock:
+        try:
+            stat = os.stat(caminho)
+        except FileNotFoundError:
+            stat = None
+
+        chave = None if stat is None else (stat.st_size, stat.st_mtime_ns)
+        anterior = _cache.get(caminho)
+        if chave is not None and anterior is not None and anterior[0] == chave:
+            return anterior[1]
+
+        painel = None
+        if stat is not None:
+            with open(caminho) as arquivo:
+                painel = json.load(arquivo)
+        if painel is None or painel.get("formato") != FORMATO:
+            painel = gerar_painel(caminho)
+            stat = os.stat(caminho)
+            chave = (stat.st_size, stat.st_mtime_ns)
+        _cache[caminho] = (chave, painel)
+        return painel
+
+
+# Função para obter a figura de barras do painel, montada uma vez por
+# versão dos dados (ver figuras.py). conn e caminhos são repassados para a
+# versão dos dados; sem eles, valem o banco e os arquivos do repositório.
+def figura_do_painel(painel, conn=None, caminhos=None):
+    import aquecimento
+
+    # Espera os imports em segundo plano antes de usar o plotly (ver aquecimento.py)
+    aquecimento.aguardar_modulos()
+    import plotly.graph_objects as go
+
+    from figuras import figura_em_cache
+
+    return figura_em_cache("painel_barras", (painel["versao"],),
+                           lambda: go.Figure(painel["figura_barras"]), conn, caminhos)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Gera o retrato do painel da página inicial.")
+    parser.add_argument("-o", "--destino", type=str, default=CAMINHO_PAINEL, help="Arquivo JSON do painel")
+    args = parser.parse_args()
+
+    painel = gerar_painel(args.destino)
+    print(f"Painel {painel['versao']} gravado em {args.destino}: {painel['kpis']}")
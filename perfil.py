@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Modo de perfil das páginas: mede o tempo de cada seção e de cada comando SQL
+# de uma execução. Ativado com PERFIL=1 no ambiente ou com ?perfil=1 na URL
+# (?perfil=0 desativa para a sessão). As amostras de cada execução são
+# acrescentadas em CAMINHO_PERFIL, uma linha JSON por execução.
+CAMINHO_PERFIL = os.environ.get("PERFIL_ARQUIVO", "perfil.jsonl")
+
+# Amostras da execução atual. Cada sessão do Streamlit roda o script em uma
+# thread, então o estado fica por thread; None quando o perfil está desligado.
+_local = threading.local()
+_lock = threading.Lock()
+
+
+# Função para saber se a execução atual está sendo medida
+def ativo():
+    return getattr(_local, "amostras", None) is not None
+
+
+# Função para começar a medir uma execução da página
+def iniciar(pagina):
+    import streamlit as st
+
+    if "perfil" in st.query_params:
+        st.session_state["perfil"] = st.query_params["perfil"] == "1"
+    habilitado = os.environ.get("PERFIL") == "1" or st.session_state.get("perfil", False)
+
+    _local.amostras = [] if habilitado else None
+    _local.pagina = pagina
+    _local.inicio = _local.marca = time.perf_counter()
+    return habilitado
+
+
+# Função para registrar uma medição na execução atual
+def registrar(tipo, nome, segundos):
+    if ativo():
+        _local.amostras.append({"tipo": tipo, "nome": nome, "segundos": segundos})
+
+
+# Mede o tempo de um trecho da página (with perfil.secao("leitura"): ...).
+# Sem o perfil ativo, não mede nada.
+@contextmanager
+def secao(nome, tipo="secao"):
+    if not ativo():
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(tipo, nome, time.perf_counter() - inicio)
+
+
+# Função para marcar o fim de um trecho de um script de página: registra o
+# tempo desde a marca anterior (ou desde o início da execução)
+def marcar(nome):
+    if ativo():
+        agora = time.perf_counter()
+        registrar("trecho", nome, agora - _local.marca)
+        _local.marca = agora
+
+
+# Função para agrupar as amostras por seção (quantidade e tempo somado)
+def resumo(amostras):
+    import pandas as pd
+
+    if not amostras:
+        return pd.DataFrame(columns=["tipo", "nome", "chamadas", "segundos"])
+    tabela = pd.DataFrame(amostras)
+    return (tabela.groupby(["tipo", "nome"], as_index=False)
+            .agg(chamadas=("segundos", "size"), segundos=("segundos", "sum"))
+            .sort_values("segundos", ascending=False, ignore_index=True))
+
+
+# Função para encerrar a medição: grava as amostras no arquivo e mostra o
+# detalhamento aos administradores
+def finalizar():
+    if not ativo():
+        return
+    amostras, _local.amostras = _local.amostras, None
+    total = time.perf_counter() - _local.inicio
+    execucao = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "pagina": _local.pagina,
+        "total": total,
+        "amostras": amostras,
+    }
+    with _lock:
+        with open(CAMINHO_PERFIL, "a") as arquivo:
+            arquivo.write(json.dumps(execucao, ensure_ascii=False) + "\n")
+
+    import streamlit as st
+
+    if st.session_state.get("autenticado") and st.session_state.get("role") == "Admin":
+        with st.expander(f"⏱️ Perfil da página: {total * 1000:.0f} ms"):
+            tabela = resumo(amostras)
+            tabela["ms"] = tabela.pop("segundos") * 1000
+            st.dataframe(tabela, use_container_width=True)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Resume as medições gravadas no modo de perfil das páginas.")
+    parser.add_argument("-i", "--arquivo", type=str, default=CAMINHO_PERFIL, help="Arquivo com as medições")
+    args = parser.parse_args()
+
+    with open(args.arquivo) as arquivo:
+        execucoes = [json.loads(linha) for linha in arquivo if linha.strip()]
+
+    paginas = pd.DataFrame([{"pagina": e["pagina"], "total": e["total"]} for e in execucoes])
+    print(paginas.groupby("pagina")["total"].describe(percentiles=[0.5, 0.95]).to_string())
+    print()
+    amostras = [dict(a, pagina=e["pagina"]) for e in execucoes for a in e["amostras"]]
+    for pagina, grupo in pd.DataFrame(amostras).groupby("pagina"):
+        print(f"== {pagina}")
+        print(resumo(grupo.to_dict("records")).to_string(index=False))
@@ -0,0 +1,106 @@
+import streamlit as st
+
+# Opções de tamanho de página nas telas de registros
+TAMANHOS_PAGINA = [25, 50, 100, 500]
+
+
+# Função para ler uma página de registros, do mais recente para o mais antigo.
+# A paginação é feita pela chave (data, id): cada página começa logo depois do
+# último registro da anterior, sem OFFSET, usando o índice em registros(data).
+# inicio/fim (datas no formato AAAA-MM-DD) filtram o período no próprio SQLite.
+# O pandas é importado só quando os registros são lidos (não na tela de login).
+def ler_registros(conn, limite=50, cursor=None, inicio=None, fim=None):
+    import pandas as pd
+
+    condicoes, parametros = [], []
+    if cursor is not None:
+        data, id = cursor
+        condicoes.append('(data < ? OR (data = ? AND id < ?))')
+        parametros += [data, data, id]
+    if inicio is not None:
+        condicoes.append('data >= ?')
+        parametros.append(inicio)
+    if fim is not None:
+        condicoes.append('data <= ?')
+        parametros.append(fim)
+
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+    return pd.read_sql(f'SELECT * FROM registros {where} ORDER BY data DESC, id DESC LIMIT ?',
+                       conn, params=(*parametros, limite))
+
+
+# Função para ler o registro mais recente
+def ultimo_registro(conn):
+    import pandas as pd
+
+    return pd.read_sql('SELECT * FROM registros ORDER BY data DESC, id DESC LIMIT 1', conn)
+
+
+# Funções CRUD para registros de energia
+def criar_registro(conn, data, co2, arvores, total_energia, energia_diaria):
+    c = conn.cursor()
+    c.execute('''INSERT INTO registros 
+              (data, co2, arvores, total_energia, energia_diaria)
+              VALUES (?, ?, ?, ?, ?)''',
+              (data, co2, arvores, total_energia, energia_diaria))
+    conn.commit()
+
+
+def atualizar_registro(conn, id, data, co2, arvores, total_energia, energia_diaria):
+    c = conn.cursor()
+    c.execute('''UPDATE registros SET
+              data = ?,
+              co2 = ?,
+              arvores = ?,
+              total_energia = ?,
+              energia_diaria = ?
+              WHERE id = ?''',
+              (data, co2, arvores, total_energia, energia_diaria, id))
+    conn.commit()
+
+
+def excluir_registro(conn, id):
+    c = conn.cursor()
+    c.execute('DELETE FROM registros WHERE id = ?', (id,))
+    conn.commit()
+
+
+# Função para exibir os controles de paginação e retornar a página visível.
+# Os cursores das páginas já visitadas ficam na sessão, em st.session_state[chave].
+def pagina_registros(conn, chave):
+    col_tamanho, col_periodo = st.columns(2)
+    with col_tamanho:
+        tamanho = st.selectbox("Registros por página", TAMANHOS_PAGINA, index=1, key=f"{chave}_tamanho")
+    with col_periodo:
+        periodo = st.date_input("Filtrar por período", value=(), key=f"{chave}_periodo")
+
+    # O período pode ter só a data inicial enquanto o usuário escolhe o intervalo
+    periodo = [str(d) for d in periodo]
+    inicio = periodo[0] if len(periodo) > 0 else None
+    fim = periodo[1] if len(periodo) > 1 else None
+
+    # Mudar o tamanho da página ou o período volta para a primeira página
+    filtro = (tamanho, inicio, fim)
+    estado = st.session_state.get(chave)
+    if estado is None or estado['filtro'] != filtro:
+        estado = st.session_state[chave] = {'filtro': filtro, 'cursores': [None]}
+    cursores = estado['cursores']
+
+    # Lê um registro a mais para saber se existe uma próxima página
+    df = ler_registros(conn, tamanho + 1, cursores[-1], inicio, fim)
+    tem_proxima = len(df) > tamanho
+    df = df.iloc[:tamanho]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("⬅️ Anterior", key=f"{chave}_anterior", disabled=len(cursores) == 1):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Página {len(cursores)}")
+    with col3:
+        if st.button("Próxima ➡️", key=f"{chave}_proxima", disabled=not tem_proxima):
+            cursores.append((df['data'].iloc[-1], int(df['id'].iloc[-1])))
+            st.rerun()
+
+    return df
@@ -1,7 +1,15 @@
-import pandas as pd
+from datetime import datetime, timedelta
+
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
+
+import perfil
+from banco import conexao_da_sessao
+from painel import carregar_painel, figura_barras, figura_do_painel
+
+# Períodos do gráfico de barras. Os indicadores da página são sempre de todo
+# o histórico e vêm do retrato do painel.
+PERIODOS = ["Últimos 30 dias", "Este mês", "Este ano", "Desde a implantação", "Personalizado"]
+DIAS_PADRAO = 30
 
 # from PIL import Image
 
@@ -10,29 +18,31 @@ import plotly.graph_objects as go
 # img_resized = img.resize((300, 100))
 
 
-# Função para carregar os dados
-# @st.cache_data
-def load_data():
-    # Lê o arquivo CSV diretamente
-    data = pd.read_csv("data.csv", sep=";", parse_dates=["date"])
-    # Extrai apenas a data (sem a hora)
-    data["date_only"] = data["date"].dt.date
-    # data['date_only'] = data['date'].dt.strftime('%d-%m-%Y')
-    return data
+# Carregar o retrato do painel (indicadores e figura já calculados pela
+# ingestão, ver painel.py). O arquivo é lido uma vez por processo.
+painel = carregar_painel()
+kpis = painel["kpis"]
+perfil.marcar("leitura do painel")
+
+last_update = datetime.fromisoformat(kpis["ultima_leitura"]).strftime("%d/%m/%Y às %H:%M:%S")
 
+# Valor total acumulado em MWh e últimos valores de CO2 e árvores
+total_energy_mwh = kpis["total"]
+co2_last = kpis["co2"]
+trees_last = kpis["trees"]
 
-# Carregar os dados
-data = load_data()
+# Primeiro e último dia com leituras
+primeiro_dia = datetime.fromisoformat(painel["diario"]["date"][0]).date()
+ultimo_dia = datetime.fromisoformat(kpis["ultima_leitura"]).date()
 
-last_update = data["date"].iloc[-1].strftime("%d/%m/%Y às %H:%M:%S")
 
-# Agrupar os dados por dia e pegar o último valor do dia
-grouped_data = data.groupby("date_only").last().reset_index()
+# Função para montar o gráfico de barras de um período. Só os dias do
+# período são lidos do banco (resumo por dia, ver armazenamento.py).
+def barras_do_periodo(inicio, fim):
+    from armazenamento import ler_resumo
 
-# Calcular o valor total acumulado em MWh
-total_energy_mwh = data["total"].iloc[-1]  # Pega o último valor da coluna 'total'
-co2_last = grouped_data["co2"].iloc[-1]  # Último valor de CO2
-trees_last = grouped_data["trees"].iloc[-1]  # Último valor de Árvores
+    dias = ler_resumo(conexao_da_sessao(), "dia", inicio, fim)
+    return figura_barras(dias.assign(date_only=dias["date"].dt.date))
 
 
 # st.image(img_resized, use_container_width=False)
@@ -64,36 +74,41 @@ st.markdown("---")
 
 # Primeira figura: Gráfico de barras por date e today
 st.header("📅 Geração de energia por dia")
-fig_bar = px.bar(
-    grouped_data,
-    x="date_only",
-    y="today",
-    title=" ",
-    labels={"date_only": "Data", "today": "Geração de Energia (kWh)"},
-    text="today",  # Exibe os valores de 'today' dentro das barras
-)
-
-# Ajustar o tamanho da fonte e o estilo do texto nas barras
-fig_bar.update_traces(
-    textfont_size=16,  # Tamanho da fonte dos valores
-    textposition="inside",  # Posiciona o texto dentro das barras
-    insidetextanchor="middle",  # Centraliza o texto dentro das barras
-    textfont_color="white",  # Cor do texto (branco para contraste)
-)
 
-# Ajustar o layout do gráfico de barras
-fig_bar.update_layout(
-    title_font_size=24,  # Título maior
-    xaxis_title_font_size=20,  # Título do eixo X maior
-    yaxis_title_font_size=20,  # Título do eixo Y maior
-    xaxis_tickfont_size=14,  # Valores do eixo X maiores
-    yaxis_tickfont_size=14,  # Valores do eixo Y maiores
-    uniformtext_minsize=12,  # Tamanho mínimo do texto
-    uniformtext_mode="hide",  # Esconde texto que não couber
-    xaxis_tickformat="%d-%m-%Y",  # Formata o eixo X para exibir apenas a data
-)
+# Período exibido; os períodos prontos terminam no dia da última leitura
+periodo = st.radio("Período", PERIODOS, horizontal=True, label_visibility="collapsed")
+recentes = max(primeiro_dia, ultimo_dia - timedelta(days=DIAS_PADRAO - 1))
+inicio, fim = recentes, ultimo_dia
+if periodo == "Este mês":
+    inicio = ultimo_dia.replace(day=1)
+elif periodo == "Este ano":
+    inicio = ultimo_dia.replace(month=1, day=1)
+elif periodo == "Desde a implantação":
+    inicio = primeiro_dia
+elif periodo == "Personalizado":
+    escolhido = st.date_input("Intervalo", value=(recentes, ultimo_dia), min_value=primeiro_dia,
+                              max_value=ultimo_dia, format="DD/MM/YYYY")
+    # Enquanto só a primeira data foi escolhida, o intervalo tem um dia; com
+    # o campo limpo, fica o período padrão (últimos dias)
+    if len(escolhido) == 2:
+        inicio, fim = escolhido
+    elif len(escolhido) == 1:
+        inicio = fim = escolhido[0]
+inicio = max(inicio, primeiro_dia)
+
+# Figuras montadas uma vez por versão dos dados e compartilhadas entre as
+# sessões; o histórico inteiro já vem pronto no retrato do painel
+if inicio <= primeiro_dia and fim >= ultimo_dia:
+    fig_bar = figura_do_painel(painel, conexao_da_sessao())
+else:
+    # Importado aqui: o módulo carrega o pandas (ver aquecimento.py)
+    from figuras import figura_em_cache
+    fig_bar = figura_em_cache("home_barras", (inicio, fim), lambda: barras_do_periodo(inicio, fim),
+                              conexao_da_sessao())
+perfil.marcar("figura de barras")
 
 st.plotly_chart(fig_bar)
+perfil.marcar("envio da figura de barras")
 
 
 st.markdown("---")
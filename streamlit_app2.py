@@ -3,24 +3,23 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from amostragem import agrupar_barras, serie_no_periodo, titulo_periodo
+from armazenamento import ler_diario
+from banco import conexao_da_sessao
+from figuras import figura_em_cache
 
-# Função para carregar os dados
-@st.cache_data
-def load_data():
-    # Lê o arquivo CSV diretamente
-    data = pd.read_csv('data.csv', sep=';', parse_dates=['date'])
-    # Extrai apenas a data (sem a hora)
-    data['date_only'] = data['date'].dt.date
-    return data
 
-# Carregar os dados
-data = load_data()
-
-# Agrupar os dados por dia e pegar o último valor do dia
-grouped_data = data.groupby('date_only').last().reset_index()
+# Carregar os dados consolidados por dia (último valor de cada dia) do banco
+# de amostras (ver armazenamento.py)
+conn = conexao_da_sessao()
+grouped_data = ler_diario(conn)
+if grouped_data.empty:
+    # Banco ainda sem leituras: a ingestão importa o histórico do data.csv (ver ingestao.py)
+    st.info('Ainda não há leituras no banco. Os gráficos aparecem depois da próxima ingestão.')
+    st.stop()
 
 # Calcular o valor total acumulado em MWh
-total_energy_mwh = data['total'].iloc[-1]  # Pega o último valor da coluna 'total'
+total_energy_mwh = grouped_data['total'].iloc[-1]  # Pega o último valor da coluna 'total'
 
 # Título da página
 st.title('📊 Dados de Geração de Energia')
@@ -43,72 +42,102 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Primeira figura: Gráfico de barras por date e today
-st.header('📅 Geração de energia por dia')
-fig_bar = px.bar(
-    grouped_data,
-    x='date_only',
-    y='today',
-    title=' ',
-    labels={'date_only': 'Data', 'today': 'Geração de Energia (kWh)'},
-    text='today'  # Exibe os valores de 'today' dentro das barras
-)
-
-# Ajustar o tamanho da fonte e o estilo do texto nas barras
-fig_bar.update_traces(
-    textfont_size=16,  # Tamanho da fonte dos valores
-    textposition='inside',  # Posiciona o texto dentro das barras
-    insidetextanchor='middle',  # Centraliza o texto dentro das barras
-    textfont_color='white'  # Cor do texto (branco para contraste)
-)
+# Período visível nos gráficos; ao aproximar, os dados são lidos com mais detalhe
+primeiro_dia = grouped_data['date_only'].iloc[0]
+ultimo_dia = grouped_data['date_only'].iloc[-1]
+if primeiro_dia < ultimo_dia:
+    inicio, fim = st.slider('Período', min_value=primeiro_dia, max_value=ultimo_dia,
+                            value=(primeiro_dia, ultimo_dia), format='DD/MM/YYYY')
+else:
+    inicio, fim = primeiro_dia, ultimo_dia
+inicio = pd.Timestamp(inicio)
+fim = pd.Timestamp(fim) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+# Função para montar o gráfico de barras do período
+def montar_barras():
+    # Dias do período; acima do limite de pontos dos gráficos, somados por
+    # semana, mês ou ano (ver amostragem.py)
+    dias_periodo = grouped_data[(grouped_data['date'] >= inicio) & (grouped_data['date'] <= fim)]
+    bar_data, periodo = agrupar_barras(dias_periodo, 'date_only', 'today')
+
+    fig_bar = px.bar(
+        bar_data,
+        x='date_only',
+        y='today',
+        title=' ',
+        labels={'date_only': titulo_periodo(periodo), 'today': 'Geração de Energia (kWh)'},
+        text='today'  # Exibe os valores de 'today' dentro das barras
+    )
+
+    # Ajustar o tamanho da fonte e o estilo do texto nas barras
+    fig_bar.update_traces(
+        textfont_size=16,  # Tamanho da fonte dos valores
+        textposition='inside',  # Posiciona o texto dentro das barras
+        insidetextanchor='middle',  # Centraliza o texto dentro das barras
+        textfont_color='white'  # Cor do texto (branco para contraste)
+    )
+
+    # Ajustar o layout do gráfico de barras
+    fig_bar.update_layout(
+        title_font_size=24,  # Título maior
+        xaxis_title_font_size=20,  # Título do eixo X maior
+        yaxis_title_font_size=20,  # Título do eixo Y maior
+        xaxis_tickfont_size=16,  # Valores do eixo X maiores
+        yaxis_tickfont_size=16,  # Valores do eixo Y maiores
+        uniformtext_minsize=12,  # Tamanho mínimo do texto
+        uniformtext_mode='hide'  # Esconde texto que não couber
+    )
+    return fig_bar
+
+
+# Função para montar o gráfico de linhas do período
+def montar_linhas():
+    line_data = serie_no_periodo(conn, ['co2', 'trees'], inicio, fim)
+    fig_line = go.Figure()
+
+    # Adiciona a linha para CO2
+    fig_line.add_trace(go.Scatter(
+        x=line_data['date'],
+        y=line_data['co2'],
+        mode='lines',
+        name='CO2',
+        line=dict(width=3)  # Linha mais grossa
+    ))
+
+    # Adiciona a linha para Trees
+    fig_line.add_trace(go.Scatter(
+        x=line_data['date'],
+        y=line_data['trees'],
+        mode='lines',
+        name='Árvores',
+        line=dict(width=3)  # Linha mais grossa
+    ))
+
+    # Configura o layout do gráfico de linhas
+    fig_line.update_layout(
+        title='',
+        title_font_size=24,  # Título maior
+        xaxis_title='Data',
+        xaxis_title_font_size=20,  # Título do eixo X maior
+        yaxis_title='Valor',
+        yaxis_title_font_size=20,  # Título do eixo Y maior
+        xaxis_tickfont_size=16,  # Valores do eixo X maiores
+        yaxis_tickfont_size=16,  # Valores do eixo Y maiores
+        legend_font_size=18,  # Legenda maior
+    )
+    return fig_line
 
-# Ajustar o layout do gráfico de barras
-fig_bar.update_layout(
-    title_font_size=24,  # Título maior
-    xaxis_title_font_size=20,  # Título do eixo X maior
-    yaxis_title_font_size=20,  # Título do eixo Y maior
-    xaxis_tickfont_size=16,  # Valores do eixo X maiores
-    yaxis_tickfont_size=16,  # Valores do eixo Y maiores
-    uniformtext_minsize=12,  # Tamanho mínimo do texto
-    uniformtext_mode='hide'  # Esconde texto que não couber
-)
 
+# Primeira figura: Gráfico de barras por date e today
+st.header('📅 Geração de energia por dia')
+# As figuras de cada período ficam no cache do processo até os dados mudarem
+# (ver figuras.py); as visitas seguintes não montam as figuras de novo
+fig_bar = figura_em_cache('barras_periodo', (inicio, fim), montar_barras, conn)
 st.plotly_chart(fig_bar)
 
 # Segunda figura: Gráfico de linhas por date, co2 e trees
 st.header('🌍 Redução na Emissão de CO2 e Árvores plantadas por dia')
-fig_line = go.Figure()
-
-# Adiciona a linha para CO2
-fig_line.add_trace(go.Scatter(
-    x=grouped_data['date_only'],
-    y=grouped_data['co2'],
-    mode='lines',
-    name='CO2',
-    line=dict(width=3)  # Linha mais grossa
-))
-
-# Adiciona a linha para Trees
-fig_line.add_trace(go.Scatter(
-    x=grouped_data['date_only'],
-    y=grouped_data['trees'],
-    mode='lines',
-    name='Árvores',
-    line=dict(width=3)  # Linha mais grossa
-))
-
-# Configura o layout do gráfico de linhas
-fig_line.update_layout(
-    title='',
-    title_font_size=24,  # Título maior
-    xaxis_title='Data',
-    xaxis_title_font_size=20,  # Título do eixo X maior
-    yaxis_title='Valor',
-    yaxis_title_font_size=20,  # Título do eixo Y maior
-    xaxis_tickfont_size=16,  # Valores do eixo X maiores
-    yaxis_tickfont_size=16,  # Valores do eixo Y maiores
-    legend_font_size=18,  # Legenda maior
-)
+fig_line = figura_em_cache('linhas_periodo', (inicio, fim), montar_linhas, conn)
 
 # Exibe o gráfico de linhas
 st.plotly_chart(fig_line)
\ No newline at end of file
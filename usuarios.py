@@ -0,0 +1,55 @@
+import hashlib
+import sqlite3
+
+
+# Função para criar hash da senha
+def criar_hash(senha):
+    return hashlib.sha256(senha.encode()).hexdigest()
+
+
+# Função para listar usuários, opcionalmente filtrando pelo nome no próprio SQLite
+# O pandas só é importado aqui, para que a tela de login abra sem carregá-lo.
+def listar_usuarios(conn, busca=None):
+    import pandas as pd
+
+    if not busca:
+        return pd.read_sql('SELECT id, username, role FROM usuarios', conn)
+    # Escapa os curingas do LIKE para buscar o texto literalmente
+    padrao = busca.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return pd.read_sql("SELECT id, username, role FROM usuarios WHERE username LIKE ? ESCAPE '\\'",
+                       conn, params=(f'%{padrao}%',))
+
+
+# Função para criar usuário
+def criar_usuario(conn, username, password, role):
+    c = conn.cursor()
+    try:
+        c.execute('INSERT INTO usuarios (username, password, role) VALUES (?, ?, ?)',
+                  (username, criar_hash(password), role))
+        conn.commit()
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+
+# Função para atualizar usuário
+def atualizar_usuario(conn, id, username, role):
+    c = conn.cursor()
+    c.execute('UPDATE usuarios SET username = ?, role = ? WHERE id = ?',
+              (username, role, id))
+    conn.commit()
+
+
+# Função para excluir usuário
+def excluir_usuario(conn, id):
+    c = conn.cursor()
+    c.execute('DELETE FROM usuarios WHERE id = ?', (id,))
+    conn.commit()
+
+
+# Função para autenticar usuário
+def autenticar_usuario(conn, username, password):
+    c = conn.cursor()
+    c.execute('SELECT * FROM usuarios WHERE username = ? AND password = ?',
+              (username, criar_hash(password)))
+    return c.fetchone()
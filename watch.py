@@ -1,50 +1,133 @@
 import time
 import os
+import queue
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import subprocess
+import argparse
 from datetime import datetime
-from log import logger  
+from log import logger, medir_etapa
+from gitrun import publicar
 
-# Classe que vai lidar com os eventos
+# Classe que vai lidar com os eventos.
+# O thread do observador só registra os arquivos novos; os lotes são fechados
+# depois de um intervalo sem novos arquivos (debounce) e processados por
+# trabalhadores em segundo plano.
 class MonitorArquivo(FileSystemEventHandler):
 
     # construtor
-    def __init__(self, caminho='./dados/input'):
+    def __init__(self, caminho='./dados/input', tamanho_lote=3, espera=2.0, trabalhadores=1):
         super().__init__()
         self.pasta_input = caminho
+        self.tamanho_lote = tamanho_lote
+        self.espera = espera
+
+        # Contagem feita uma única vez; depois é mantida pelos eventos.
+        # Os arquivos que já estão na pasta contam para o primeiro lote.
+        existentes = sorted(f.path for f in os.scandir(caminho) if f.is_file())
+        self.total_arquivos = len(existentes)
+        self._pendentes = existentes
+        self._lock = threading.Lock()
+        self._timer = None
+
+        # Fila de lotes e trabalhadores que executam o processamento
+        self.fila = queue.Queue()
+        self._lock_publicacao = threading.Lock()
+        for i in range(trabalhadores):
+            threading.Thread(target=self._trabalhar, name=f"lote-{i}", daemon=True).start()
+        if self._pendentes:
+            with self._lock:
+                self._reiniciar_espera()
 
 
     def on_created(self, event):
         # Verifica se o arquivo foi criado e não é um diretório
         if not event.is_directory:
             logger.info("Arquivo adicionado: %s", event.src_path)
-            
-            # Conta o número de arquivos na pasta dados/input
-            total_arquivos = len([f for f in os.listdir(self.pasta_input) if os.path.isfile(os.path.join(self.pasta_input, f))])
-            
-            # Verifica se existem 3 arquivos na pasta
-            if total_arquivos == 3:
-                print(f"-> Existem 3 arquivos na pasta {self.pasta_input}. Executando o script.")
-                logger.info("Existem 3 arquivos na pasta %s. Executando o script.", self.pasta_input)
-                # Executa o comando se houver 3 arquivos na pasta
-                subprocess.run(["python", "processa.py"], shell=True)
-
-
-                # Obtendo o horário atual para a mensagem de commit
-                horario_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                mensagem_commit = f"Commit via gitrun.py em {horario_atual}"
-                git_cmd = ["python", "gitrun.py", "-m", mensagem_commit] 
-                # Executa o comando para comitar os arquivos no repositório
-                subprocess.run(git_cmd, shell=True) 
-
-            else:
-                print(f"-> Existem {total_arquivos} arquivos na pasta {self.pasta_input}. Aguardando mais arquivos.")
-                logger.info("Existem %s arquivos na pasta %s. Aguardando mais arquivos.", total_arquivos, self.pasta_input)
+            with self._lock:
+                self.total_arquivos += 1
+                self._pendentes.append(event.src_path)
+                self._reiniciar_espera()
+
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            with self._lock:
+                self.total_arquivos -= 1
+                if event.src_path in self._pendentes:
+                    self._pendentes.remove(event.src_path)
+
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            with self._lock:
+                dentro = os.path.dirname(os.path.abspath(event.dest_path)) == os.path.abspath(self.pasta_input)
+                if event.src_path in self._pendentes:
+                    self._pendentes.remove(event.src_path)
+                    if dentro:
+                        self._pendentes.append(event.dest_path)
+                if not dentro:
+                    self.total_arquivos -= 1
+
+
+    # Reinicia o intervalo de espera a cada arquivo novo (chamado com o lock)
+    def _reiniciar_espera(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.espera, self._fechar_lotes)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+    # Separa os arquivos pendentes em lotes completos e os envia para a fila
+    def _fechar_lotes(self):
+        with self._lock:
+            lotes = []
+            while len(self._pendentes) >= self.tamanho_lote:
+                lotes.append(self._pendentes[:self.tamanho_lote])
+                self._pendentes = self._pendentes[self.tamanho_lote:]
+            restantes = len(self._pendentes)
+            total = self.total_arquivos
+
+        for lote in lotes:
+            print(f"-> Lote com {len(lote)} arquivos na pasta {self.pasta_input}. Executando o script.")
+            logger.info("Lote com %s arquivos na pasta %s. Executando o script.", len(lote), self.pasta_input)
+            self.fila.put(lote)
+
+        if restantes:
+            print(f"-> Existem {total} arquivos na pasta {self.pasta_input}. Aguardando mais arquivos.")
+            logger.info("Existem %s arquivos na pasta %s. Aguardando mais arquivos.", total, self.pasta_input)
+
+
+    # Laço dos trabalhadores: processa os lotes da fila
+    def _trabalhar(self):
+        while True:
+            lote = self.fila.get()
+            try:
+                self._processar(lote)
+            except Exception as e:
+                logger.error("Erro ao processar o lote %s: %s", lote, e)
+            finally:
+                self.fila.task_done()
+
+
+    def _processar(self, lote):
+        # Executa o script de processamento, que lê os arquivos da pasta de entrada
+        with medir_etapa("processamento") as medicao:
+            medicao.linhas = len(lote)
+            subprocess.run(["python", "processa.py"], check=True)
+
+        # Obtendo o horário atual para a mensagem de commit
+        horario_atual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        mensagem_commit = f"Commit via gitrun.py em {horario_atual}"
+        # Os commits são feitos um de cada vez, mesmo com vários trabalhadores
+        with self._lock_publicacao, medir_etapa("publicacao"):
+            publicar(mensagem_commit)
 
 # Função para iniciar a observação
-def monitorar_pasta(caminho):
-    event_handler = MonitorArquivo(caminho)
+def monitorar_pasta(caminho, tamanho_lote=3, espera=2.0, trabalhadores=1):
+    event_handler = MonitorArquivo(caminho, tamanho_lote, espera, trabalhadores)
     observer = Observer()
     observer.schedule(event_handler, caminho, recursive=False)
     observer.start()
@@ -60,8 +143,16 @@ def monitorar_pasta(caminho):
 
     observer.join()
 
-# Caminho da pasta a ser monitorada
-pasta_para_monitorar = "./dados/input"
 
-# Iniciar monitoramento
-monitorar_pasta(pasta_para_monitorar)
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Monitora a pasta de entrada e processa os arquivos em lotes.')
+    parser.add_argument("-p", "--pasta", type=str, default="./dados/input", help='Pasta a ser monitorada')
+    parser.add_argument("-l", "--lote", type=int, default=3, help='Quantidade de arquivos por lote')
+    parser.add_argument("-e", "--espera", type=float, default=2.0, help='Segundos sem novos arquivos antes de fechar os lotes')
+    parser.add_argument("-t", "--trabalhadores", type=int, default=1,
+                        help='Lotes processados em paralelo (só use mais de 1 se o processa.py puder rodar em paralelo)')
+    args = parser.parse_args()
+
+    # Iniciar monitoramento
+    monitorar_pasta(args.pasta, args.lote, args.espera, args.trabalhadores)